@@ -7,17 +7,17 @@ from hanabi_classes import *
 
 def names(cards):
     """Returns the names of a list of cards"""
-    return [card['name'] for card in cards]
+    return [card.name for card in cards]
 
 def get_plays(cards, progress):
     """Return a list of plays (subset of input); call only on visible cards!"""
     return [card for card in cards if is_playable(card, progress)]
 
 def is_cardname_playable(cardName, progress):
-    return progress[cardName[1]] + 1 == int(cardName[0])
+    return progress[cardName[1]] + 1 == ID_RANKS[CARD_IDS[cardName]]
 
 def is_playable(card, progress):
-    return is_cardname_playable(card["name"], progress)
+    return progress[ID_SUITS[card.id]] + 1 == ID_RANKS[card.id]
 
 def get_played_cards(cards, progress):
     """Return the sublist of already played cards;
@@ -25,41 +25,41 @@ def get_played_cards(cards, progress):
     return [card for card in cards if has_been_played(card, progress)]
 
 def has_been_played(card, progress):
-    return progress[card['name'][1]] >= int(card['name'][0])
+    return progress[ID_SUITS[card.id]] >= ID_RANKS[card.id]
 
 def get_duplicate_cards(cards):
     """Return the sublist of duplicate cards; call only on visible cards!"""
-    return [card for card in cards if names(cards).count(card['name']) > 1]
+    return [card for card in cards if names(cards).count(card.name) > 1]
 
 def get_visible_cards(cards1, cards2):
     """Return a list of the intersection of cards1 and cards2; call only on
     visible cards!"""
-    return [card for card in cards1 if card['name'] in names(cards2)]
+    return [card for card in cards1 if card.name in names(cards2)]
 
 def get_nonvisible_cards(cards1, names2):
     """Return a list of cards that are in cards1 but not names2; call only on
     visible cards!"""
-    return [card for card in cards1 if card['name'] not in names2]
+    return [card for card in cards1 if card.name not in names2]
 
 def possible_hints(card):
-    name = card['name']
+    name = card.name
     return name[0] + VANILLA_SUITS if RAINBOW_SUIT in name else name
 
 def find_highest(cards):
     """Returns card with highest number value in a list;
     call only on visible cards!"""
-    return max(cards, key=lambda card: int(card['name'][0]))
+    return max(cards, key=lambda card: ID_RANKS[card.id])
 
 def find_lowest(cards):
     """Analogous to find_highest"""
-    return min(cards, key=lambda card: int(card['name'][0]))
+    return min(cards, key=lambda card: ID_RANKS[card.id])
 
 def deduce_plays(cards, progress, suits):
     """Return a list of plays (subset of input); fine to call on own hand."""
     plays = []
     for card in cards:
         suit, value = '', ''
-        for info in card['direct']:
+        for info in card.direct:
             if info in suits:
                 if suit == '':
                     suit = info
@@ -73,7 +73,7 @@ def deduce_plays(cards, progress, suits):
                 value = info
 
         if len(suit) == 2: # Try to deduce that card is not rainbow.
-            for info in card['indirect']:
+            for info in card.indirect:
                 if info in suits:
                     suit = suit.replace(RAINBOW_SUIT, '')
                     break # Already found the info we needed.
@@ -91,9 +91,8 @@ def playable_cards(progress):
 def cards_possibly_in_set(card, cardNameArray):
     """Given a list of card names, return only those which are consistent
        with the hinted information about card (non-visible)."""
-    return [name for name in cardNameArray
-            if (all(matches(name, hint) for hint in card['direct']) and not
-                any(matches(name, hint) for hint in card['indirect']))]
+    possible = card.possible
+    return [name for name in cardNameArray if possible >> CARD_IDS[name] & 1]
 
 def possibly_playable(card, progress):
     """Check if it is possible with current knowledge that card is playable"""
@@ -102,7 +101,7 @@ def possibly_playable(card, progress):
 
 def matches(name, hint):
     """Name is the card including number+suit, hint is single char"""
-    return (hint in name or (hint in VANILLA_SUITS and RAINBOW_SUIT in name))
+    return HINT_TOUCHES[hint] >> CARD_IDS[name] & 1 == 1
 
 def other_players(me, r):
     """Return a list of all players but me, in turn order starting after me"""
@@ -112,7 +111,7 @@ def count_unique_future_plays(cards, progress):
     """Returns the number of plays or future plays,
     counting duplicate cards only once; call only on visible cards!"""
     remaining_plays = \
-        set([card['name'] for card in cards if is_playable(card, progress)])
+        set([card.name for card in cards if is_playable(card, progress)])
     return len(remaining_plays)
 
 def get_all_visible_cards(player, r):
@@ -184,7 +183,7 @@ def get_all_knowable_cards(player, r):
     # Discard pile includes Discarded and Played
     l.extend(r.discardpile)
     l.extend(names(get_all_visible_cards(player, r)))
-    l.extend([card['name'] for card in r.h[player].cards if card['known']])
+    l.extend([card.name for card in r.h[player].cards if card.known])
     return l
 
 def inverse_card_set(cardset, r):
@@ -5,12 +5,15 @@ of this file is the Round class, which stores all of the game info, along with
 the nested Hand class, which stores player-specific info.
 
 Common attributes/arguments:
-  card (dict): Representation of a card.  Includes when the card was drawn and
+  card (Card): Representation of a card.  Includes when the card was drawn and
     all associated hint info.  See Hand class for details.
   names (list of str): How players are identified in printed output.
 """
 
 import random, logging, sys
+from array import array
+from copy import copy, deepcopy
+from collections import Counter, namedtuple, deque
 
 VANILLA_SUITS = 'rygbw'
 SUIT_CONTENTS = '1112233445' # must be ascending
@@ -18,14 +21,57 @@ N_HINTS       = 8
 N_LIGHTNING   = 3
 RAINBOW_SUIT  = '?'
 PURPLE_SUIT   = 'p'
+HAND_HISTORY_WINDOW = 10 # Default number of past turns kept for r.hands_at
+
+# Every card identity has an integer id, 5 * suit index + rank - 1, with the
+# suits numbered in the order of ALL_SUITS.  The ids are the same in every game
+# type, so the tables below serve all of them.
+ALL_SUITS  = VANILLA_SUITS + RAINBOW_SUIT + PURPLE_SUIT
+RANKS      = ''.join(sorted(set(SUIT_CONTENTS)))
+CARD_NAMES = [rank + suit for suit in ALL_SUITS for rank in RANKS] # by id
+CARD_IDS   = {name : i for i, name in enumerate(CARD_NAMES)}
+ID_RANKS   = [int(name[0]) for name in CARD_NAMES]
+ID_SUITS   = [name[1] for name in CARD_NAMES]
+# Bitmask (bit i is card id i) of the cards a hint touches; rainbows match any
+# vanilla color.
+HINT_TOUCHES = {info : sum(1 << i for i, name in enumerate(CARD_NAMES)
+                           if info in name or (info in VANILLA_SUITS and
+                                               RAINBOW_SUIT in name))
+                for info in ALL_SUITS + RANKS}
+
+# Events that Round publishes to the AIs through the on_* methods of AIPlayer.
+# turn is the turn number in which the event happened, player is the seat of
+# the acting player and slot an index into hand.cards (oldest card first).
+Deal    = namedtuple('Deal', ['turn'])
+Draw    = namedtuple('Draw', ['turn', 'player', 'card'])
+Hint    = namedtuple('Hint', ['turn', 'player', 'receiver', 'info', 'touched'])
+Play    = namedtuple('Play', ['turn', 'player', 'card', 'slot'])
+Discard = namedtuple('Discard', ['turn', 'player', 'card', 'slot'])
+Misplay = namedtuple('Misplay', ['turn', 'player', 'card', 'slot'])
+GameEnd = namedtuple('GameEnd', ['turn', 'score', 'lightning'])
 
 class AIPlayer(object):
-    """AIPlayer class that should be inherited from when making"""
+    """AIPlayer class that should be inherited from when making
+
+    rng (random.Random): The player's own random stream.  Use it instead of
+      the random module; Round reseeds it at the start of every round, so a
+      player's choices don't depend on what anything else draws.
+    """
+    # How many turns back the AI needs r.hands_at to go (None for all turns).
+    handHistoryWindow = HAND_HISTORY_WINDOW
+    # Whether to collect debugging statistics in r.debug (wrapper option -d).
+    # Leave it off for long runs: collecting them can cost time.
+    collectDebug = False
+    # Whether to write notes on the cards in r.debug for the JSON log of the
+    # game (wrapper option -o).
+    writeNotes = False
+
     def __init__(self, me, logger, verbosity):
         super(AIPlayer, self).__init__()
         self.logger = logger
         self.verbosity = verbosity
         self.me = me
+        self.rng = random.Random()
 
     @classmethod
     def get_name(cls):
@@ -41,6 +87,206 @@ class AIPlayer(object):
         """Can be overridden to perform logging at the end of the game"""
         pass
 
+    # The methods below can be overridden to follow the game as it happens.
+    # Round only calls the ones an AI overrides.  Apart from on_deal, they
+    # are called at the end of the turn, so r.turnNumber is event.turn + 1.
+
+    def on_deal(self, r, event):
+        """Called after the hands are dealt (Deal)."""
+        pass
+
+    def on_draw(self, r, event):
+        """Called when a card replaces one that was played or discarded;
+        event.card is the new card (Draw)."""
+        pass
+
+    def on_hint(self, r, event):
+        """Called after a hint; event.touched are the slots of the cards of
+        the receiver that match it (Hint)."""
+        pass
+
+    def on_play(self, r, event):
+        """Called after a card is played successfully (Play)."""
+        pass
+
+    def on_discard(self, r, event):
+        """Called after a card is discarded (Discard)."""
+        pass
+
+    def on_misplay(self, r, event):
+        """Called after a card is misplayed (Misplay)."""
+        pass
+
+    def on_game_end(self, r, event):
+        """Called once the round is over; event.score doesn't take the
+        loss_score setting into account (GameEnd)."""
+        pass
+
+
+class DebugCounter(object):
+    """Counts of a fixed list of events, for AIs to store in r.debug.
+
+    The counts are kept in an array instead of under separate keys, so
+    counting is cheap.  Counters of different rounds (or worker processes)
+    are combined with merge."""
+    def __init__(self, names):
+        self.names = tuple(names)
+        self.index = {name : i for i, name in enumerate(self.names)}
+        self.counts = array('l', [0] * len(self.names))
+
+    def add(self, name, n=1):
+        self.counts[self.index[name]] += n
+
+    def merge(self, other):
+        """Add the counts of other, which counts the same events."""
+        assert self.names == other.names
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+
+    def items(self):
+        """(name, count) pairs of all events, in order."""
+        return zip(self.names, self.counts)
+
+
+class Card(object):
+    """One card in a hand; see the Hand class for its fields.
+
+    Cards used to be dicts, and still support dict-style access (card['name'],
+    'name' in card, card.get, card.pop) so existing AIs keep working.  Keys
+    other than the fields (e.g. ones an AI adds) are kept in a small dict.
+    New code can read the fields as attributes (card.name), which is faster.
+    """
+    __slots__ = ('name', 'id', 'time', 'direct', 'indirect', 'possible',
+                 'known', 'sec_name', 'cardNo', 'position', 'misplayed',
+                 'extra')
+    FIELDS = frozenset(__slots__[:-1])
+
+    def __init__(self, name, time, cardNo, possible):
+        self.name      = name
+        self.id        = CARD_IDS[name]
+        self.time      = time
+        self.direct    = []
+        self.indirect  = []
+        self.possible  = possible
+        self.known     = False
+        self.sec_name  = name
+        self.cardNo    = cardNo
+        self.position  = -1
+        self.misplayed = False
+        self.extra     = None
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key) if key in Card.FIELDS else self.extra[key]
+        except (AttributeError, TypeError): # Hidden by PolicedHand / no extras
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in Card.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if key in Card.FIELDS:
+            delattr(self, key)
+        else:
+            del self.extra[key]
+
+    def __contains__(self, key):
+        if key in Card.FIELDS:
+            return hasattr(self, key)
+        return self.extra is not None and key in self.extra
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def pop(self, key, *default):
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self[key]
+        del self[key]
+        return value
+
+    def keys(self):
+        return [key for key in self.__slots__[:-1] if hasattr(self, key)] + \
+               list(self.extra or ())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __eq__(self, other):
+        """Equal if all keys and values are, like the dicts cards were."""
+        if not isinstance(other, Card):
+            return NotImplemented
+        return self is other or (self.cardNo == other.cardNo and
+                                 self.items() == other.items())
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __deepcopy__(self, memo):
+        card = Card.__new__(Card)
+        memo[id(self)] = card
+        for key in self.__slots__:
+            if hasattr(self, key):
+                value = getattr(self, key)
+                if isinstance(value, (list, dict)):
+                    value = deepcopy(value, memo)
+                setattr(card, key, value)
+        return card
+
+    def as_of(self, nDirect, nIndirect, possible, known):
+        """Copy of the card as it was when it had nDirect direct and
+        nIndirect indirect hints (see Round.hands_at)."""
+        card = Card.__new__(Card)
+        for key in self.__slots__:
+            if hasattr(self, key):
+                setattr(card, key, getattr(self, key))
+        card.direct = self.direct[:nDirect]
+        card.indirect = self.indirect[:nIndirect]
+        card.possible = possible
+        card.known = known
+        card.position = -1
+        card.misplayed = False
+        if self.extra is not None:
+            card.extra = dict(self.extra)
+        return card
+
+    def copy(self):
+        """Copy of the card that can be hinted independently of it."""
+        card = Card.__new__(Card)
+        for key in self.__slots__:
+            if hasattr(self, key):
+                setattr(card, key, getattr(self, key))
+        card.direct = list(self.direct)
+        card.indirect = list(self.indirect)
+        if self.extra is not None:
+            card.extra = dict(self.extra)
+        return card
+
+    def __repr__(self):
+        return 'Card({})'.format(dict(self.items()))
+
+
+def overrides(player, method):
+    """Whether the class of player overrides the method of AIPlayer."""
+    for cls in type(player).__mro__:
+        if method in vars(cls):
+            return cls is not AIPlayer
+    return False
+
 
 class Round(object):
     """Store round info and interact with AI players.
@@ -64,8 +310,11 @@ class Round(object):
     log (bool): True if logging to file (more detail should appear)
     zazz (list of str): Schnazzy labeled indents for verbose output.
     logger (logging object): game state log, created in the wrapper
-    cardsLeft (list of str): Cards that not all players have seen yet.
-    deck (list of str)
+    handHistory (deque): Snapshots of the hands at the start of the last
+      turns; use hands_at() to look at them.
+    cardsLeft (Counter of str): Cards that not all players have seen yet.
+    publicKnowledge (PublicKnowledge): What everyone knows about the hands.
+    deck (Deck): Cards not drawn yet.  Behaves like a list of str.
     discardpile: list of (names of) cards which are discarded
     """
 
@@ -79,12 +328,16 @@ class Round(object):
             self.suits += PURPLE_SUIT
 
         self.nPlayers = len(names)
-        self.h = [self.Hand(i, names[i]) for i in range(self.nPlayers)]
+        # Bitmask of the ids of the cards in this game type.
+        self.idMask = sum(1 << CARD_IDS[rank + suit]
+                          for suit in self.suits for rank in RANKS)
+        self.h = [self.Hand(i, names[i], self.idMask)
+                  for i in range(self.nPlayers)]
 
         self.whoseTurn          = 0
         self.turnNumber         = 0
         self.playHistory        = []
-        self.HandHistory        = [] # Hands at the start of each turn
+        self.handHistory        = None # Snapshots for hands_at, see there
         self.progressHistory    = []
         self.progress           = {suit : 0 for suit in self.suits}
         self.gameOverTimer      = None
@@ -108,6 +361,23 @@ class Round(object):
 
         # Provides a shared starting seed for fixed-seed pseudo RNG methods.
         self.CommonSeed = random.randint(0,sys.maxsize)
+        # Every AI gets its own random stream for the round, derived from
+        # CommonSeed so the deck shuffle doesn't depend on it.
+        for i in range(len(players)):
+            players[i].rng = random.Random(self.CommonSeed * len(players) + i)
+
+        # The AIs to publish each kind of event to: those overriding its method.
+        self.listeners = {}
+        for method in ('on_deal', 'on_draw', 'on_hint', 'on_play',
+                       'on_discard', 'on_misplay', 'on_game_end'):
+            self.listeners[method] = [player for player in players
+                                      if overrides(player, method)]
+
+        # Keep as many turns of hand history as the most demanding AI needs.
+        windows = [player.handHistoryWindow for player in players]
+        self.handHistory = deque(maxlen=None if None in windows
+                                        else max(windows + [0]))
+        self.handHistoryTurns = 0 # Number of snapshots taken
 
         if not len(self.logger.handlers):
             # Define logging handlers if not defined by wrapper script.
@@ -124,10 +394,11 @@ class Round(object):
             for number in SUIT_CONTENTS:
                 deck.append(number + suit)
 
-        self.cardsLeft = deck[:] # Start tracking unplayed cards.
+        self.cardsLeft = Counter(deck) # Start tracking unplayed cards.
+        self.publicKnowledge = self.PublicKnowledge(self)
 
         random.shuffle(deck)
-        self.deck = deck
+        self.deck = self.Deck(deck)
         self.startingDeck = deck[:]
         self.startingDeckSize = len(deck)
 
@@ -137,36 +408,108 @@ class Round(object):
         for i in range(self.nPlayers): # Deal cards to all players.
             for j in reversed(range(handSize)):
                 self.h[i].add(self.draw(), self.turnNumber, self.startingDeckSize-len(self.deck)-1)
+                self.publicKnowledge.drawn(self.h[i].cards[-1])
             if self.verbose:
                 self.h[i].show(self.zazz[0], self.logger)
                 self.zazz[0] = ' ' * len(self.zazz[0])
+        self.publish('on_deal', Deal(self.turnNumber))
+
+    def publish(self, method, event):
+        """Pass event to the AIs listening for it."""
+        for player in self.listeners[method]:
+            getattr(player, method)(self, event)
+
+    def end_game(self):
+        """Tell the AIs that the round is over."""
+        self.publish('on_game_end', GameEnd(self.turnNumber,
+                     sum(self.progress.values()), self.lightning))
 
     def draw(self):
         """Remove and return the top card of the deck."""
-        return self.deck.pop(0)
+        return self.deck.draw()
 
     def replace_card(self, card, hand):
         """Drop the card, draw a new one, and update public info."""
-        if not card['known']:
-            self.cardsLeft.remove(card['name'])
-        card['position'] = len(hand.cards) - hand.cards.index(card)
+        card.position = len(hand.cards) - hand.cards.index(card)
         ReplacedIndex = hand.drop(card)
+        self.publicKnowledge.removed(card)
         self.DropIndRecord.append(ReplacedIndex)
-        self.discardpile.append(card['name'])
+        self.discardpile.append(card.name)
         if self.deck != []:
             hand.add(self.draw(), self.turnNumber, self.startingDeckSize-len(self.deck)-1)
+            self.publicKnowledge.drawn(hand.cards[-1])
             return True # There was still a card to draw.
         return False
 
+    def snapshot_hands(self):
+        """Record the hands at the start of a turn for hands_at.  Only the
+        number of hints on each card is stored, since the hint lists only
+        grow."""
+        self.handHistory.append(tuple(
+            tuple((card, len(card.direct), len(card.indirect), card.possible,
+                   card.known) for card in hand.cards)
+            for hand in self.h))
+        self.handHistoryTurns += 1
+
+    def hands_at(self, turn):
+        """The hands (list of Hand) at the start of the given turn.
+
+        For the current turn these are the live hands (r.h).  The hands of a
+        past turn are rebuilt from snapshots on every call, as copies that
+        are not updated any further; under the police, cards hidden from the
+        player to move are hidden in them too.  Only the last
+        handHistoryWindow turns (the largest window of the AIs playing) are
+        available."""
+        if turn == self.turnNumber:
+            return self.h
+        index = turn - (self.handHistoryTurns - len(self.handHistory))
+        if not 0 <= index < len(self.handHistory) or turn > self.turnNumber:
+            raise IndexError('hands of turn {} are not kept'.format(turn))
+        hands = []
+        for hand, snapshot in zip(self.h, self.handHistory[index]):
+            oldHand = self.Hand(hand.seat, hand.name, hand.idMask)
+            oldHand.cards = [record[0].as_of(*record[1:])
+                             for record in snapshot]
+            hands.append(oldHand)
+        return hands
+
+    def fork(self):
+        """A child Round to try out a line of play on, e.g. for lookahead.
+
+        The child shares the deck order, the players and the hand history with
+        self and copies only what a move changes, so forking is cheap.  Advance
+        it with make_play; it neither logs nor tells the AIs anything, and
+        leaves self as it was."""
+        child = copy(self)
+        child.h = []
+        for hand in self.h:
+            childHand = self.Hand(hand.seat, hand.name, hand.idMask)
+            childHand.cards = [card.copy() for card in hand.cards]
+            child.h.append(childHand)
+        child.deck = copy(self.deck) # The cards tuple is shared.
+        child.playHistory = list(self.playHistory)
+        child.progressHistory = list(self.progressHistory)
+        child.progress = dict(self.progress)
+        child.DropIndRecord = list(self.DropIndRecord)
+        child.discardpile = list(self.discardpile)
+        child.cardsLeft = Counter(self.cardsLeft)
+        child.publicKnowledge = copy(self.publicKnowledge)
+        child.publicKnowledge.r = child
+        child.publicKnowledge.knownCards = set(self.publicKnowledge.knownCards)
+        child.handHistory = copy(self.handHistory)
+        child.listeners = {method : [] for method in self.listeners}
+        child.verbose = child.log = False
+        return child
+
     def print_all_knowledge(self):
         for i in range(self.nPlayers):
             allCards = []
             directKnowledge = []
             indirectKnowledge = []
             for card in self.h[i].cards:
-                allCards.append(card['name'])
-                directKnowledge.append(''.join(card['direct']))
-                indirectKnowledge.append(''.join(card['indirect']))
+                allCards.append(card.name)
+                directKnowledge.append(''.join(card.direct))
+                indirectKnowledge.append(''.join(card.indirect))
             self.logger.info(' ' * len(self.zazz[1]) * 2 +
                         " {} [{}] knows ['{}'] and not ['{}']"\
                         .format(self.h[i].name, ' '.join(allCards),
@@ -177,14 +520,28 @@ class Round(object):
         """Retrieve and execute AI p's play for whoever's turn it is."""
         if self.log and self.turnNumber != 0: self.print_all_knowledge()
 
-        play = playType = playValue = None
+        play = None
         hand = self.h[self.whoseTurn]
+        self.snapshot_hands()
         with self.PolicedHand(self.isPoliced, hand):
-            play = playType, playValue = p.play(self)
+            play = p.play(self)
+        self.execute_play(play)
+
+    def make_play(self, play):
+        """Execute play for whoever's turn it is without asking their AI
+        (used to advance a fork)."""
+        self.snapshot_hands()
+        self.execute_play(play)
+
+    def execute_play(self, play):
+        """Carry out play (see get_play) and publish its events."""
+        playType, playValue = play
+        hand = self.h[self.whoseTurn]
         self.playHistory.append(play)
         self.progressHistory.append(dict.copy(self.progress))
 
-        verboseHandAtStart = ' '.join([card['name'] for card in reversed(hand.cards)])
+        verboseHandAtStart = ' '.join([card.name for card in reversed(hand.cards)])
+        events = [] # To publish at the end of the turn.
         if playType == 'hint':
             assert self.hints != 0
             targetPlayer, info = playValue
@@ -192,16 +549,21 @@ class Round(object):
             assert info in self.suits or info in SUIT_CONTENTS
             assert info != '?'
             targetHand = self.h[targetPlayer]
+            touches = HINT_TOUCHES[info]
             for card in targetHand.cards:
-                suit = card['name'][1]
-                if suit == '?' and info in VANILLA_SUITS:
-                    card['direct'].append(info) # Rainbows match any color.
-                elif info in card['name']:
-                    card['direct'].append(info) # Card matches hint.
+                if touches >> card.id & 1:
+                    card.direct.append(info) # Card matches hint.
+                    card.possible &= touches
                 else:
-                    card['indirect'].append(info) # Card does not match hint.
+                    card.indirect.append(info) # Card does not match hint.
+                    card.possible &= ~touches
+            self.publicKnowledge.hinted(targetHand)
             self.hints -= 1
             desc = '{} to {}'.format(info, self.h[targetPlayer].name)
+            touched = tuple(i for i, card in enumerate(targetHand.cards)
+                            if touches >> card.id & 1)
+            events.append(('on_hint', Hint(self.turnNumber, self.whoseTurn,
+                                           targetPlayer, info, touched)))
 
         elif playType == 'resign':
             self.Resign = True
@@ -211,26 +573,39 @@ class Round(object):
             card = playValue
             assert card in hand
 
-            desc = card['name']
+            desc = card.name
             desc += ' from slot {}'.format(len(hand.cards) - hand.cards.index(card))
+            drew = False
 
             if playType == 'discard':
-                if self.replace_card(card, hand):
-                    desc += ' and draws {}'.format(hand.cards[-1]['name'])
+                drew = self.replace_card(card, hand)
+                if drew:
+                    desc += ' and draws {}'.format(hand.cards[-1].name)
                 self.hints = min(self.hints + 1, N_HINTS)
+                events.append(('on_discard', Discard(self.turnNumber,
+                               self.whoseTurn, card, self.DropIndRecord[-1])))
 
             elif playType == 'play':
-                value, suit = card['name']
-                if self.replace_card(card, hand):
-                    desc += ' and draws {}'.format(hand.cards[-1]['name'])
-                if self.progress[suit] == int(value) - 1: # Legal play
+                rank, suit = ID_RANKS[card.id], ID_SUITS[card.id]
+                drew = self.replace_card(card, hand)
+                if drew:
+                    desc += ' and draws {}'.format(hand.cards[-1].name)
+                if self.progress[suit] == rank - 1: # Legal play
                     self.progress[suit] += 1
-                    if value == '5':
+                    if rank == 5:
                         self.hints = min(self.hints + 1, N_HINTS)
+                    events.append(('on_play', Play(self.turnNumber,
+                                   self.whoseTurn, card, self.DropIndRecord[-1])))
                 else: # Illegal play
-                    card['misplayed'] = True
+                    card.misplayed = True
                     self.lightning += 1
                     desc += ' (DOH!)'
+                    events.append(('on_misplay', Misplay(self.turnNumber,
+                                   self.whoseTurn, card, self.DropIndRecord[-1])))
+
+            if drew:
+                events.append(('on_draw', Draw(self.turnNumber,
+                                               self.whoseTurn, hand.cards[-1])))
 
         self.whoseTurn = (self.whoseTurn + 1) % self.nPlayers
         self.turnNumber += 1
@@ -240,45 +615,158 @@ class Round(object):
                     .format(hand.name, verboseHandAtStart, playType, desc))
             self.zazz[1] = ' ' * len(self.zazz[1])
 
+        for method, event in events:
+            self.publish(method, event)
+
+
+    class Deck(object):
+        """The cards not drawn yet: a cursor into the shuffled deck, so that
+        drawing doesn't shift the remaining cards.  Supports len, indexing,
+        iteration and comparison with a list (r.deck == []) like the plain
+        list of card names it replaces."""
+
+        def __init__(self, cards):
+            self.cards = tuple(cards)
+            self.top = 0 # Index of the next card to draw.
+
+        def draw(self):
+            """Remove and return the top card."""
+            if self.top == len(self.cards):
+                raise IndexError('draw from empty deck')
+            self.top += 1
+            return self.cards[self.top - 1]
+
+        def __len__(self):
+            return len(self.cards) - self.top
+
+        def __bool__(self):
+            return self.top != len(self.cards)
+        __nonzero__ = __bool__
+
+        def __iter__(self):
+            return iter(self.cards[self.top:])
+
+        def __getitem__(self, index):
+            return list(self.cards[self.top:])[index]
+
+        def __eq__(self, other):
+            if not isinstance(other, (list, tuple, type(self))):
+                return NotImplemented
+            return list(self) == list(other)
+
+        def __ne__(self, other):
+            return not self == other
+
+        __hash__ = None
+
+        def __repr__(self):
+            return repr(list(self))
+
+
+    class PublicKnowledge(object):
+        """Keep track of what every player can deduce about the cards in the
+        hands from public information alone: the hints, and the cards which
+        are played, discarded or known.  Once all copies of a card are
+        accounted for like that, no other card can be that card.
+
+        Narrows card.possible, and sets card.known when a single possibility
+        is left.  The AIs may set card.known themselves too, so which cards
+        are known from public information is kept in knownCards.
+
+        knownCards (set of int): cardNo of every card in a hand that is known.
+        exhausted (int): Bitmask of the ids of which no copy is unaccounted
+          for (i.e. cardsLeft is 0).
+        """
+
+        def __init__(self, r):
+            self.r = r
+            self.knownCards = set()
+            self.exhausted = 0
+
+        def is_known(self, card):
+            """Whether the card can be deduced solely from public info."""
+            return card.cardNo in self.knownCards
+
+        def candidates(self, card):
+            """Names of the cards that card can still be."""
+            return [name for i, name in enumerate(CARD_NAMES)
+                    if card.possible >> i & 1]
+
+        def drawn(self, card):
+            """Update for a card that was just drawn."""
+            self.narrow([card])
+
+        def hinted(self, hand):
+            """Update for a hint to hand (after card.possible is narrowed)."""
+            self.narrow(hand.cards)
+
+        def removed(self, card):
+            """Update for a card that was played or discarded."""
+            if self.is_known(card):
+                self.knownCards.discard(card.cardNo)
+            else:
+                self.account_for(card)
+
+        def account_for(self, card):
+            """Take a copy of card off cardsLeft, and rule the card out
+            everywhere else once no copy is unaccounted for."""
+            cardsLeft = self.r.cardsLeft
+            assert cardsLeft[card.name] > 0
+            cardsLeft[card.name] -= 1
+            if cardsLeft[card.name] == 0:
+                self.exhausted |= 1 << card.id
+                self.narrow([c for hand in self.r.h for c in hand.cards
+                             if c.possible >> card.id & 1])
+
+        def narrow(self, cards):
+            """Remove exhausted ids from the possibilities of cards, and
+            register the cards which become known."""
+            for card in cards:
+                if card.cardNo in self.knownCards:
+                    continue
+                card.possible &= ~self.exhausted
+                if card.possible & (card.possible - 1) == 0: # Single id left.
+                    self.knownCards.add(card.cardNo)
+                    card.known = True
+                    self.account_for(card)
+
 
     class Hand(object):
         """Manage one player's hand of cards.
 
-        cards (list of dict): One dict per card.  Keys:
+        cards (list of Card): One Card per card.  Keys (also attributes):
           name (str): card name (e.g., '2?' is a rainbow two)
+          id (int): integer id of the card's identity (see CARD_IDS)
           time (int): turn number in which card was drawn
           direct (list of char): hint info that matches the card; can be either
             a color or a number; chronological; duplicates allowed
           indirect (list of char): same as direct but info does not match card
+          possible (int): bitmask of the ids the card can be given the hints
+            (bit i set if id i is possible)
           known (bool): whether card can be deduced solely from public info
+            (set by Round; AIs may set it too, see PublicKnowledge)
           cardNo (int): unique number of the card
           position (int): the position from which the card was played or discarded (0-4). Equals -1 if still in hand
           misplayed (bool): set to true if this card was misplayed
         seat (int): Player ID number (starting player is 0).
+        idMask (int): Bitmask of the ids of all cards in the game.
         """
 
-        def __init__(self, seat, name):
+        def __init__(self, seat, name, idMask):
             """Instantiate a Hand."""
             self.cards = []
             self.seat = seat
             self.name = name
+            self.idMask = idMask
 
         def show(self, zazz, logger):
             """Print cards (verbose output only)."""
-            out = [card['name'] for card in reversed(self.cards)]
+            out = [card.name for card in reversed(self.cards)]
             logger.info(zazz + ' ' + self.name + ': ' + ' '.join(out))
 
         def add(self, newCard, turnNumber, cardNo):
             """Add a card to the hand."""
-            self.cards.append({ 'name'     : newCard,
-                                'time'     : turnNumber,
-                                'direct'   : [],
-                                'indirect' : [],
-                                'known'    : False,
-                                'sec_name' : newCard,
-                                'cardNo'   : cardNo,
-                                'position' : -1,
-                                'misplayed': False })
+            self.cards.append(Card(newCard, turnNumber, cardNo, self.idMask))
 
         def drop(self, card):
             """Discard a card from the hand."""
@@ -288,7 +776,7 @@ class Round(object):
                     return i
 
         def card_equals(self, card1, card2):
-            return card1["cardNo"] == card2["cardNo"]
+            return card1.cardNo == card2.cardNo
 
         def __contains__(self, card):
             """Convenience function to determine if card in hand"""
@@ -300,7 +788,7 @@ class Round(object):
 
     class PolicedHand(object):
         """Allows you to create a scope that will remove the 'name'
-           field from the given hand, returning it to normal when
+           and 'id' fields from the given hand, returning it to normal when
            leaving the scope"""
         def __init__(self, isPoliced, hand):
             self.isPoliced = isPoliced
@@ -311,12 +799,15 @@ class Round(object):
                 for card in self.hand.cards:
                     if not card['known']:
                         card['sec_name'] = card.pop('name', -1)
+                        card.pop('id', None)
 
         def __exit__(self, exc_type, exc_val, exc_tb):
             if self.isPoliced:
                 for card in self.hand.cards:
                     card['name'] = card['sec_name']
-            if str(exc_val) == '\'name\'':
+                    card['id'] = CARD_IDS[card['name']]
+            if isinstance(exc_val, (KeyError, AttributeError)) and \
+               str(exc_val).split(' ')[-1].strip('\'') in ('name', 'id'):
                 # Very likely this is an issue for the police
                 print("*"*37)
                 print("\n\n You have been caught by the police! \n\n")
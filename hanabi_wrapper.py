@@ -10,13 +10,24 @@ Command-line arguments (see usage):
     'scores', result of each round; 'verbose', play by play; 'log',
     detailed log file for the gamestate at each play)
   loss_score: Whether to award points after a game is lost
+  jobs: Number of worker processes the rounds are spread over.  Output is
+    the same as when playing all rounds in this process: either way, every
+    round is played by freshly created players.
+  debug: Let the AIs collect debugging statistics, which are printed at the
+    end.  This can slow them down.
+  round(s): Play only round K (or rounds A up to B) of the run.  Every round's
+    seed is derived from the master seed and the round number, so with the
+    same seed these rounds are played exactly as in the full run.
 """
 
-import sys, argparse, logging, random, os
+import sys, argparse, logging, random, os, hashlib
 from time import gmtime, strftime
 from math import sqrt
-from play_hanabi import play_one_round, player_end_game_logging
-from hanabi_classes import SUIT_CONTENTS, AIPlayer
+from multiprocessing import Pool
+from play_hanabi import play_one_round, player_end_game_logging, \
+    write_json_log, merge_debug, replay_output, init_worker, \
+    play_round_in_worker
+from hanabi_classes import SUIT_CONTENTS, AIPlayer, DebugCounter
 from players import *
 
 availablePlayers = {}
@@ -38,20 +49,22 @@ parser.add_argument('-l', '--loss_score', default='zero', metavar='loss_score',
   type=str, help='zero or full')
 parser.add_argument('-s', '--seed', default=-1,
   metavar='seed', type=int, help='fixed random seed.')
+parser.add_argument('--round', default=None, metavar='K',
+  type=int, help='only play round K (counting from 0)')
+parser.add_argument('--rounds', default=None, metavar='A:B',
+  type=str, help='only play rounds A up to (not including) B')
+parser.add_argument('-j', '--jobs', default=1, metavar='jobs',
+  type=int, help='number of worker processes to play rounds in')
 parser.add_argument('-p', '--police',
   dest='police', action='store_true', help='Turns on the police to catch cheaters')
 parser.set_defaults(police=False)
+parser.add_argument('-d', '--debug',
+  dest='debug', action='store_true', help='Let the AIs collect debugging statistics')
+parser.set_defaults(debug=False)
 parser.add_argument('-o', '--output',
   dest='output', action='store_true', help='Output a JSON file of the game in log.json')
 parser.set_defaults(output=False)
 
-args = parser.parse_args()
-
-assert args.game_type in ('rainbow', 'purple', 'vanilla')
-assert args.n_rounds > 0
-assert args.verbosity in ('silent', 'scores', 'verbose', 'log')
-assert args.loss_score in ('zero', 'full')
-
 def get_logger(args):
   # Create logging object for all output.
   logger = logging.getLogger('game_log')
@@ -74,86 +87,162 @@ def std_err(lst):
     var = sumSquaredErrs / (n - 1)
     return sqrt(var / n)
 
-logger = get_logger(args)
-
-# Load players.
-players = []
-rawNames = args.requiredPlayers + args.morePlayers
-for i in range(len(rawNames)):
-    assert rawNames[i] in availablePlayers
-    players.append(availablePlayers[rawNames[i]](i, logger, args.verbosity))
-    rawNames[i] = rawNames[i].capitalize()
-
-# Resolve duplicate names by appending '1', '2', etc. as needed.
-names = []
-counters = {name : 0 for name in rawNames}
-for name in rawNames:
-    if rawNames.count(name) > 1:
-        counters[name] += 1
-        names.append(name + str(counters[name]))
+def round_seed(seed, roundNumber):
+    """Seed for one round, derived from the master seed and the round number
+    only (not from the rounds before it)."""
+    key = '{} {}'.format(seed, roundNumber).encode('utf-8')
+    return int(hashlib.sha256(key).hexdigest()[:16], 16)
+
+# Worker processes may import this file again, so only the main process plays.
+if __name__ == '__main__':
+    args = parser.parse_args()
+
+    assert args.game_type in ('rainbow', 'purple', 'vanilla')
+    assert args.n_rounds > 0
+    assert args.verbosity in ('silent', 'scores', 'verbose', 'log')
+    assert args.loss_score in ('zero', 'full')
+    assert args.jobs > 0
+    assert args.round is None or args.rounds is None
+
+    # Round numbers to play.
+    if args.round is not None:
+        roundNumbers = [args.round]
+    elif args.rounds is not None:
+        first, last = args.rounds.split(':')
+        roundNumbers = list(range(int(first), int(last)))
+    else:
+        roundNumbers = list(range(args.n_rounds))
+    assert roundNumbers and roundNumbers[0] >= 0
+    args.n_rounds = len(roundNumbers)
+
+    logger = get_logger(args)
+    AIPlayer.collectDebug = args.debug
+    AIPlayer.writeNotes = args.output
+
+    # Load players.  They are created anew for every round (see below).
+    playerClasses = []
+    rawNames = args.requiredPlayers + args.morePlayers
+    for i in range(len(rawNames)):
+        assert rawNames[i] in availablePlayers
+        playerClasses.append(availablePlayers[rawNames[i]])
+        rawNames[i] = rawNames[i].capitalize()
+    # Humans can't answer from a worker process.
+    assert args.jobs == 1 or 'Human' not in rawNames
+
+    # Resolve duplicate names by appending '1', '2', etc. as needed.
+    names = []
+    counters = {name : 0 for name in rawNames}
+    for name in rawNames:
+        if rawNames.count(name) > 1:
+            counters[name] += 1
+            names.append(name + str(counters[name]))
+        else:
+            names.append(name)
+
+    # Pad names for better verbose display.
+    longestName = ''
+    for name in names:
+        if len(name) > len(longestName):
+            longestName = name
+    for i in range(len(names)):
+        while len(names[i]) < len(longestName):
+            names[i] += ' '
+
+    if args.verbosity == 'log':
+        logger.info('#'*22 + ' NEW ROUNDSET ' + '#'*22)
+        logger.info('{} ROUNDSET: {} round(s) of {} Hanabi'\
+                    .format(strftime("%a, %d %b %Y %H:%M:%S +0000", gmtime()),
+                    args.n_rounds, args.game_type))
+
+    # A generated seed is shown unless silent, so the run can be repeated.
+    seedGenerated = args.seed < 0
+    if seedGenerated:
+        args.seed = random.randint(0, sys.maxsize)
+    if args.verbosity == 'log' or \
+       (seedGenerated and args.verbosity != 'silent'):
+        logger.info('Seed: {}'.format(args.seed))
+    # Every round gets its own seed, so a round plays out the same no matter
+    # which rounds are played before it, or which process plays it.
+    roundSeeds = [round_seed(args.seed, k) for k in roundNumbers]
+
+    debug = {} # a dictionary players can write into which will be printed in the end. Useful for collecting statistics
+    # if you set r.debug['stop'] = 0, then the log of that game will be appended to log.json, and no new game will be started
+
+    if args.output and os.path.exists('log.json'):
+      os.remove('log.json')
+      for i in range(len(playerClasses)):
+        for c in range(10 * (5 if args.game_type == 'vanilla' else 6)):
+            debug[('note', i, c)] = ''
+
+    # Play rounds.
+    scores = []
+    if args.jobs == 1:
+        for i in range(args.n_rounds):
+            if 'stop' in debug:
+                logger.info("Games interrupted by player after round " + str(roundNumbers[i]) + "!")
+                args.n_rounds = i
+                break
+            if args.verbosity in ('verbose', 'log'):
+                logger.info('\n' + 'ROUND {}:'.format(roundNumbers[i]))
+            random.seed(roundSeeds[i])
+            # Fresh players, as in the worker processes, so no state an AI
+            # keeps is carried over from one round to the next.
+            players = [playerClass(k, logger, args.verbosity)
+                       for k, playerClass in enumerate(playerClasses)]
+            score = play_one_round(args.game_type, players, names, args.verbosity,
+                                   args.loss_score, args.police, args.output, debug)
+            scores.append(score)
+            if args.verbosity != 'silent':
+                logger.info('Score: ' + str(score))
+            player_end_game_logging(players)
     else:
-        names.append(name)
-
-# Pad names for better verbose display.
-longestName = ''
-for name in names:
-    if len(name) > len(longestName):
-        longestName = name
-for i in range(len(names)):
-    while len(names[i]) < len(longestName):
-        names[i] += ' '
-
-if args.verbosity == 'log':
-    logger.info('#'*22 + ' NEW ROUNDSET ' + '#'*22)
-    logger.info('{} ROUNDSET: {} round(s) of {} Hanabi'\
-                .format(strftime("%a, %d %b %Y %H:%M:%S +0000", gmtime()),
-                args.n_rounds, args.game_type))
-
-if args.seed >= 0:
-    random.seed(args.seed)
-
-debug = {} # a dictionary players can write into which will be printed in the end. Useful for collecting statistics
-# if you set r.debug['stop'] = 0, then the log of that game will be appended to log.json, and no new game will be started
-
-if args.output and os.path.exists('log.json'):
-  os.remove('log.json')
-  for i in range(len(players)):
-    for c in range(10 * (5 if args.game_type == 'vanilla' else 6)):
-        debug[('note', i, c)] = ''
-
-# Play rounds.
-scores = []
-for i in range(args.n_rounds):
-    if 'stop' in debug:
-        logger.info("Games interrupted by player after round " + str(i) + "!")
-        args.n_rounds = i
-        break
-    if args.verbosity in ('verbose', 'log'):
-        logger.info('\n' + 'ROUND {}:'.format(i))
-    score = play_one_round(args.game_type, players, names, args.verbosity,
-                           args.loss_score, args.police, args.output, debug)
-    scores.append(score)
+        pool = Pool(args.jobs, init_worker,
+                    (args.game_type, playerClasses,
+                     names, args.verbosity, args.loss_score, args.police,
+                     args.output, args.debug))
+        chunksize = max(1, args.n_rounds // (16 * args.jobs))
+        results = pool.imap(play_round_in_worker, roundSeeds, chunksize)
+        # Results arrive in round order; replay them as a serial run would.
+        for i, result in enumerate(results):
+            if 'stop' in debug:
+                logger.info("Games interrupted by player after round " + str(roundNumbers[i]) + "!")
+                args.n_rounds = i
+                break
+            if args.verbosity in ('verbose', 'log'):
+                logger.info('\n' + 'ROUND {}:'.format(roundNumbers[i]))
+            score, gameMessages, endMessages, roundDebug, jsonLog = result
+            replay_output(logger, gameMessages)
+            merge_debug(debug, roundDebug)
+            for output in jsonLog:
+                write_json_log(output, args.output)
+            scores.append(score)
+            if args.verbosity != 'silent':
+                logger.info('Score: ' + str(score))
+            replay_output(logger, endMessages)
+        pool.terminate()
+        pool.join()
+
+    # Print average scores.
     if args.verbosity != 'silent':
-        logger.info('Score: ' + str(score))
-    player_end_game_logging(players)
-
-# Print average scores.
-if args.verbosity != 'silent':
-    logger.info('')
-if len(scores) > 1: # Only print stats if there were multiple rounds.
-    max_score = int(SUIT_CONTENTS[-1]) * \
-                (5 if args.game_type == 'vanilla' else 6)
-    count_max = scores.count(max_score)
-    perfect_games = count_max/float(args.n_rounds)
-    # the sample standard deviation for the amount of perfect scores
-    std_perfect_games = sqrt(count_max * (args.n_rounds - count_max) / \
-                             float (args.n_rounds - 1)) / args.n_rounds
-    logger.info('AVERAGE SCORE: {:.2f} +/- {:.3f} (1 std. err.)'\
-                .format(mean(scores), std_err(scores)))
-    logger.info('PERFECT GAMES: {:.2f}% +/- {:.2f}pp (1 std. err.)'
-                .format(100*perfect_games, 100*std_perfect_games))
-elif args.verbosity == 'silent': # Still print score for silent single round
-    logger.info('Score: ' + str(scores[0]))
-
-debug = {k:v for k, v in debug.items() if v is not 0 and v is not ''}
-if debug: print("debug info:",debug)
\ No newline at end of file
+        logger.info('')
+    if len(scores) > 1: # Only print stats if there were multiple rounds.
+        max_score = int(SUIT_CONTENTS[-1]) * \
+                    (5 if args.game_type == 'vanilla' else 6)
+        count_max = scores.count(max_score)
+        perfect_games = count_max/float(args.n_rounds)
+        # the sample standard deviation for the amount of perfect scores
+        std_perfect_games = sqrt(count_max * (args.n_rounds - count_max) / \
+                                 float (args.n_rounds - 1)) / args.n_rounds
+        logger.info('AVERAGE SCORE: {:.2f} +/- {:.3f} (1 std. err.)'\
+                    .format(mean(scores), std_err(scores)))
+        logger.info('PERFECT GAMES: {:.2f}% +/- {:.2f}pp (1 std. err.)'
+                    .format(100*perfect_games, 100*std_perfect_games))
+    elif args.verbosity == 'silent': # Still print score for silent single round
+        logger.info('Score: ' + str(scores[0]))
+
+    for key, value in list(debug.items()):
+        if isinstance(value, DebugCounter):
+            del debug[key]
+            debug.update(value.items())
+    debug = {k:v for k, v in debug.items() if v != 0 and v != ''}
+    if debug: print("debug info:",debug)
@@ -5,7 +5,7 @@ round can be played.  Low-level details, along with thorough documentation, are
 in another module (hanabi_classes).
 """
 
-import json, io, os
+import json, io, os, sys, random, logging, numbers
 from hanabi_classes import *
 
 def to_json (r, action):
@@ -26,8 +26,11 @@ def to_json (r, action):
         dic = {"type":actionType, "target":target}
     return dic
 
-def play_one_round(gameType, players, names, verbosity, lossScore, isPoliced, writeOutput, debug):
-    """Play a full round and return the score (int)."""
+def play_one_round(gameType, players, names, verbosity, lossScore, isPoliced, writeOutput, debug, jsonLog=None):
+    """Play a full round and return the score (int).
+
+    If jsonLog is a list, the JSON record of the round (if any) is appended to
+    it instead of being written to log.json."""
     for i in range(len(players)):
         for c in range(10 * (5 if gameType == 'vanilla' else 6)):
             debug[('note', i, c)] = ''
@@ -51,8 +54,9 @@ def play_one_round(gameType, players, names, verbosity, lossScore, isPoliced, wr
 
         r.get_play(players[r.whoseTurn]) # Play one turn.
 
+    r.end_game() # Let the AIs know the round is over.
+
     if writeOutput or 'stop' in debug:
-        if not writeOutput and os.path.exists('log.json'): os.remove('log.json')
         actions = list(map(lambda action: to_json(r, action), r.playHistory))
         handSize = 4
         if r.nPlayers < 4: handSize += 1
@@ -63,16 +67,118 @@ def play_one_round(gameType, players, names, verbosity, lossScore, isPoliced, wr
         if gameType == 'purple': variant = "Six Suits"
         if gameType == 'vanilla': variant = "No Variant"
         output = { "actions": actions, "deck": startDeck, "notes": notes, "players": players, "variant": variant }
-        with io.open('log.json', 'a', encoding='utf-8') as f:
-            f.write(json.dumps(output, ensure_ascii=False))
-            f.write('\n\n')
-
+        if jsonLog is None:
+            write_json_log(output, writeOutput)
+        else:
+            jsonLog.append(output)
 
     if r.lightning == N_LIGHTNING and lossScore == 'zero':
         return 0 # Award no points for a loss
     return sum(r.progress.values()) # Final score
 
+def write_json_log(output, writeOutput):
+    """Append the JSON record of one round to log.json.  Without -o, the file
+    only holds the round after which a player asked to stop."""
+    if not writeOutput and os.path.exists('log.json'): os.remove('log.json')
+    with io.open('log.json', 'a', encoding='utf-8') as f:
+        f.write(json.dumps(output, ensure_ascii=False))
+        f.write('\n\n')
+
 def player_end_game_logging(players):
     """Will log any information specific to a player at the end of the game"""
     for player in players:
         player.end_game_logging()
+
+def merge_debug(total, roundDebug):
+    """Fold the debug dict of a single round into the running total, as if
+    both rounds had written into the same dict: numbers are counters and add
+    up, as do DebugCounters, and everything else (e.g. notes) keeps the value
+    of the latest round."""
+    for key, value in roundDebug.items():
+        old = total.get(key)
+        if isinstance(value, numbers.Number) and isinstance(old, numbers.Number):
+            total[key] = old + value
+        elif isinstance(value, DebugCounter) and isinstance(old, DebugCounter):
+            old.merge(value)
+        else:
+            total[key] = value
+
+
+class CapturingHandler(logging.Handler):
+    """Logging handler that keeps the messages instead of printing them, so a
+    worker process can hand them back to the wrapper.  Text printed to stdout
+    is kept in the same list (see write), so the order is preserved.
+
+    Each entry is (isLogMessage, text)."""
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append((True, self.format(record)))
+
+    def write(self, text):
+        self.messages.append((False, text))
+
+    def flush(self):
+        pass
+
+    def take(self):
+        messages, self.messages = self.messages, []
+        return messages
+
+
+def replay_output(logger, messages):
+    """Print the output captured by a CapturingHandler."""
+    for isLogMessage, text in messages:
+        if isLogMessage:
+            logger.info(text)
+        else:
+            sys.stdout.write(text)
+
+
+# Settings shared by all rounds a worker process plays; see init_worker.
+workerSettings = {}
+
+def init_worker(gameType, playerClasses, names, verbosity, lossScore, isPoliced, writeOutput, collectDebug):
+    """Set up a worker process of the wrapper's process pool.  All output of
+    the rounds is captured, because the wrapper prints it in round order."""
+    AIPlayer.collectDebug = collectDebug
+    AIPlayer.writeNotes = bool(writeOutput)
+    logger = logging.getLogger('game_log')
+    logger.setLevel(logging.DEBUG)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    handler = CapturingHandler()
+    handler.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    workerSettings.update(gameType=gameType, playerClasses=playerClasses,
+                          names=names, verbosity=verbosity,
+                          lossScore=lossScore, isPoliced=isPoliced,
+                          writeOutput=writeOutput, logger=logger,
+                          handler=handler)
+
+def play_round_in_worker(roundSeed):
+    """Play one round in a worker process with freshly created players, so no
+    state leaks between the rounds a worker plays.
+
+    Returns (score, game output, end game output, debug, JSON records) for the
+    wrapper to merge."""
+    w = workerSettings
+    random.seed(roundSeed)
+    players = [playerClass(i, w['logger'], w['verbosity'])
+               for i, playerClass in enumerate(w['playerClasses'])]
+    debug = {}
+    jsonLog = []
+    stdout = sys.stdout
+    sys.stdout = w['handler']
+    try:
+        score = play_one_round(w['gameType'], players, w['names'],
+                               w['verbosity'], w['lossScore'], w['isPoliced'],
+                               w['writeOutput'], debug, jsonLog)
+        gameMessages = w['handler'].take()
+        player_end_game_logging(players)
+        endMessages = w['handler'].take()
+    finally:
+        sys.stdout = stdout
+    return score, gameMessages, endMessages, debug, jsonLog
@@ -76,7 +76,7 @@ class BasicRainbowPlayer(AIPlayer):
         #       have been played at all
 
         if myPlayableCards != []:
-            return 'play', random.choice(myPlayableCards)
+            return 'play', self.rng.choice(myPlayableCards)
 
         if r.hints > 0:
             # look around at each other hand to see if anything is playable
@@ -100,21 +100,21 @@ class BasicRainbowPlayer(AIPlayer):
                     undeterminedCards = [card for card in playableCards
                         if not len(set('rygbw?12345') & set(card['direct']))>1]
                     if undeterminedCards != []:
-                        hintTarget = random.choice(undeterminedCards)
+                        hintTarget = self.rng.choice(undeterminedCards)
                         if '?' in hintTarget['name']:
                             # For now, just choose a random color
-                            suit = random.choice('rygbw')
-                            return 'hint', (playerId, random.choice((suit,
+                            suit = self.rng.choice('rygbw')
+                            return 'hint', (playerId, self.rng.choice((suit,
                                 (set('12345') & \
                                     set(hintTarget['name'])).pop())))
                         else:
                             return 'hint', (playerId,
-                                            random.choice(hintTarget['name']))
+                                            self.rng.choice(hintTarget['name']))
 
         # don't know what to do, let's toss an unknown card. Keep known cards.
         try:
-            return 'discard', random.choice([card for card in cards
+            return 'discard', self.rng.choice([card for card in cards
                                                 if not card['known']])
         except IndexError:
-            return 'discard', random.choice(cards)
+            return 'discard', self.rng.choice(cards)
             # All known, but nothing else to do (weep silently?)
@@ -23,9 +23,9 @@ class CheatingIdiotPlayer(AIPlayer):
         playableCards = get_plays(cards, progress)
 
         if playableCards == []:
-            return 'discard', random.choice(cards)
+            return 'discard', self.rng.choice(cards)
         else:
-            return 'play', random.choice(playableCards)
+            return 'play', self.rng.choice(playableCards)
 
     def end_game_logging(self):
         """Can be overridden to perform logging at the end of the game"""
@@ -11,6 +11,18 @@ import numpy as np
 
 from hanabi_classes import AIPlayer
 
+# The information matrix holds bitmasks of the possible values of each card:
+# bit n for number n, bit k for the k-th suit
+ALL_NUMBERS = sum(1 << i for i in range(1,6))
+ALL_SUITS = sum(1 << i for i in range(5))
+ALL_VALUES = {'NumMat':ALL_NUMBERS,'SuitMat':ALL_SUITS}
+MASK_VALUES = [[i for i in range(6) if Mask >> i & 1] for Mask in range(64)]
+POPCOUNT = np.array([len(i) for i in MASK_VALUES])
+
+# The choices of one card from each other hand, by number of players and hand
+# size. These are built once per process and shared by all games.
+CANDIDATE_INDICES = {}
+
 # This AI is designed to implement an information encoding algorithm
 # Still very much a work in progress
 
@@ -30,14 +42,22 @@ class EncodingPlayer(AIPlayer):
         self.EncodingTables = []
         for l in range(r.nPlayers):
             self.EncodingTables.append([[i,str(j)] for j in '12345rygbw' for i in [k for k in range(r.nPlayers) if k != l]])
+        # and back again
+        self.EncodingIndices = [{tuple(I):i for i,I in enumerate(Table)} 
+                                for Table in self.EncodingTables]
         self.TableSize = len(self.EncodingTables[self.SelfID])
         
         self.nCards = len(r.h[r.whoseTurn].cards)
+        if (self.nPlayers,self.nCards) not in CANDIDATE_INDICES:
+            CandidateIndices = np.array(list(it.product(range(self.nCards),
+                                                repeat=self.nPlayers-1)))
+            CandidateIndices.setflags(write=False)
+            CANDIDATE_INDICES[self.nPlayers,self.nCards] = CandidateIndices
+        self.CandidateIndices = CANDIDATE_INDICES[self.nPlayers,self.nCards]
         
-        self.SuitStr = ''
-        for k in r.suits: self.SuitStr += k + ','
-        self.SuitStr = self.SuitStr[:-1]
-        self.NumStr = '1,2,3,4,5'
+        # Bit of each hinted number or suit
+        self.HintBits = {'NumMat':{str(i):1 << i for i in range(1,6)},
+                         'SuitMat':{K:1 << k for k,K in enumerate(r.suits)}}
         
         self.SortedDeck = []
         for suit in self.suits:
@@ -45,8 +65,10 @@ class EncodingPlayer(AIPlayer):
                 self.SortedDeck.append(number + suit)
         
         
-        #First element is suit, second is numeric value
-        self.InformationMatrix = self.CompleteHandToInt(r,range(self.nPlayers),0)
+        self.InformationMatrix = {}
+        for key in ALL_VALUES:
+            self.InformationMatrix[key] = np.full([self.nPlayers,self.nCards],
+                                        ALL_VALUES[key],dtype=np.uint8)
         
         self.RunningPlayInd = -1
         self.iRecord = -1
@@ -58,7 +80,6 @@ class EncodingPlayer(AIPlayer):
         self.CodeList.append('0S_all__1S_all')
     
     def play(self, r):
-        r.HandHistory.append(c(r.h))
         nPriorTurns = len(r.playHistory)
         if r.suits != 'rygbw':
             raise NameError('Encoding AI requires vanilla suits\n')
@@ -80,10 +101,10 @@ class EncodingPlayer(AIPlayer):
                 if I[0] == 'hint':
                     GivenHint = list(I[1])
                     if self.CodeList[i] == '':
-                        NumInHand =  [len(K.cards) for K in r.HandHistory[i]]
+                        NumInHand =  [len(K.cards) for K in r.hands_at(i)]
                         self.CodeList[i] = self.CodeFromInfoMat(PlayingPlayer,NumInHand)
                     Code = self.CodeList[i]
-                    EncodedValue = self.BackOutEncodedValue(self.EncodingTables[PlayingPlayer],GivenHint)
+                    EncodedValue = self.BackOutEncodedValue(PlayingPlayer,GivenHint)
                     for j in [k for k in range(self.nPlayers) if k != PlayingPlayer]:
                         RestrictedDenseOtherHands = self.CompleteHandToInt(r,[j,PlayingPlayer],i)
                         self.ValueFromCode(Code,RestrictedDenseOtherHands,EncodedValue,j)
@@ -96,46 +117,28 @@ class EncodingPlayer(AIPlayer):
                         raise NameError('')
                         
                     MatLabel = {'N':'NumMat','S':'SuitMat'}[HintType]
-                    for j,J in enumerate(r.HandHistory[i][GivenHint[0]].cards):
+                    for j,J in enumerate(r.hands_at(i)[GivenHint[0]].cards):
                         
-                        PriorKnowledge = c(self.InformationMatrix[MatLabel][GivenHint[0],j])
-                        if PriorKnowledge == 'x':
-                            if HintType == 'N':
-                                PriorKnowledge = self.NumStr
-                            else:
-                                PriorKnowledge = self.SuitStr
-                        else:
-                            if HintType == 'S':
-                                if len(PriorKnowledge) == 1:
-                                    PriorKnowledge = str([r.suits[int(k)] for k in PriorKnowledge.split(',')])[1:-1]
-    
-                        DirectSet = list(set(PriorKnowledge.split(',')).intersection(J['direct']))
-                        if len(DirectSet) == 1:
-                            pass
-                            if HintType == 'S':
-                                self.InformationMatrix[MatLabel][GivenHint[0],j] = c([str(k) for k,K in enumerate(r.suits) if K == DirectSet[0]][0])
-                            else:
-                                self.InformationMatrix[MatLabel][GivenHint[0],j] = c(DirectSet[0])
-                        else:
-                            StrictIndirect = set(J['indirect']) - set(J['direct'])
-                            IndirectSet = set(PriorKnowledge.split(',')) - StrictIndirect
-                            
+                        PriorKnowledge = int(self.InformationMatrix[MatLabel][GivenHint[0],j])
+                        DirectSet = PriorKnowledge & self.HintMask(J['direct'],MatLabel)
+                        if POPCOUNT[DirectSet] == 1:
+                            self.InformationMatrix[MatLabel][GivenHint[0],j] = DirectSet
+                        elif HintType == 'N':
                             #Currently only use indirect method for numeric hints
-                            if HintType == 'N':
-                                self.InformationMatrix[MatLabel][GivenHint[0],j] = c(str([int(k) for k in IndirectSet])[1:-1])
+                            StrictIndirect = self.HintMask(set(J['indirect']) - set(J['direct']),MatLabel)
+                            self.InformationMatrix[MatLabel][GivenHint[0],j] = PriorKnowledge & ~StrictIndirect
                         
-                        if len(self.InformationMatrix[MatLabel][GivenHint[0],j]) == 0:
+                        if self.InformationMatrix[MatLabel][GivenHint[0],j] == 0:
                             raise NameError('Error: Possibility has been reduced to empty set')      
                       
                     self.CheckEncoding(r,i+1)
                 elif I[0] == 'play' or I[0] == 'discard':
                     self.RunningPlayInd += 1                
+                    DropInd = r.DropIndRecord[self.RunningPlayInd]
                     for key in self.InformationMatrix:
-                        for j in range(r.DropIndRecord[self.RunningPlayInd]+1,self.nCards):                    
-                            self.InformationMatrix[key][PlayingPlayer,j-1] = (
-                                c(self.InformationMatrix[key][PlayingPlayer,j]))
-    
-                        self.InformationMatrix[key][PlayingPlayer,-1] = 'x'
+                        Row = self.InformationMatrix[key][PlayingPlayer]
+                        Row[DropInd:-1] = Row[DropInd+1:]
+                        Row[-1] = ALL_VALUES[key]
                     
                     self.CheckEncoding(r,i+1)
                 else:
@@ -172,63 +175,38 @@ class EncodingPlayer(AIPlayer):
     def CodeFromInfoMat(self,CurrentPlayer,NumInHand):        
         OtherPlayers = [i for i in range(self.nPlayers) if i != CurrentPlayer]
         HandNumOther = [NumInHand[K] for K in OtherPlayers]
-        NumPosMat = np.zeros([self.nPlayers,self.nCards])
-        SuitPosMat = np.zeros([self.nPlayers,self.nCards])
-        for i,I in enumerate(self.InformationMatrix['NumMat']):
-            for j,J in enumerate(I):
-                KnownStr = c(J)
-                if KnownStr == 'x': KnownStr = self.NumStr
-                NumPosMat[i,j] = len(KnownStr.split(','))
-        for i,I in enumerate(self.InformationMatrix['SuitMat']):
-            for j,J in enumerate(I):
-                KnownStr = c(J)
-                if KnownStr == 'x': KnownStr = self.SuitStr
-                SuitPosMat[i,j] = len(KnownStr.split(','))
+        NumPosMat = POPCOUNT[self.InformationMatrix['NumMat']]
+        SuitPosMat = POPCOUNT[self.InformationMatrix['SuitMat']]
         
-        CandidateIndices = list(it.product(range(self.nCards),repeat=self.nPlayers-1))
-        ReductionListNum = []
-        ReductionListSuit = []
-        for i,I in enumerate(CandidateIndices):
-            nReductionNum = 0
-            nReductionSuit = 0
-            for j,J in enumerate(I):
-                nReductionNum += NumPosMat[OtherPlayers[j],J] - 1
-                nReductionSuit += SuitPosMat[OtherPlayers[j],J] - 1
-            ReductionListNum.append(int(nReductionNum))
-            ReductionListSuit.append(int(nReductionSuit))
+        ReductionListNum = np.sum(NumPosMat[OtherPlayers,self.CandidateIndices] - 1,axis=1)
+        ReductionListSuit = np.sum(SuitPosMat[OtherPlayers,self.CandidateIndices] - 1,axis=1)
         NumSortInd = np.argsort(ReductionListNum)[::-1]
         SuitSortInd = np.argsort(ReductionListSuit)[::-1]
+        Valid = np.all(self.CandidateIndices < HandNumOther,axis=1)
+        NumSortInd = NumSortInd[Valid[NumSortInd]]
+        SuitSortInd = SuitSortInd[Valid[SuitSortInd]]
         
         MaxReduction = np.max([np.max(ReductionListNum),np.max(ReductionListSuit)])
         CodeCandidateList = []
         for i in range(0,MaxReduction+1)[::-1]:
             # Prioritize number resolution over suit resolution
-            for j in range(len(NumSortInd)):
-                if ReductionListNum[NumSortInd[j]] == i:
-                    ColInd = list(CandidateIndices[NumSortInd[j]])
-                    if all([HandNumOther[k] > K for k,K in enumerate(ColInd)]):
-                        CodeCandidateList.append('N:' + str(ColInd)[1:-1])
-            for j in range(len(SuitSortInd)):
-                if ReductionListNum[SuitSortInd[j]] == i:
-                    ColInd = list(CandidateIndices[SuitSortInd[j]])
-                    if all([HandNumOther[k] > K for k,K in enumerate(ColInd)]):
-                        CodeCandidateList.append('S:' + str(ColInd)[1:-1])
+            for j in NumSortInd[ReductionListNum[NumSortInd] == i]:
+                CodeCandidateList.append(('N',self.CandidateIndices[j].tolist()))
+            for j in SuitSortInd[ReductionListNum[SuitSortInd] == i]:
+                CodeCandidateList.append(('S',self.CandidateIndices[j].tolist()))
         
         CodeSelection = [CodeCandidateList[0]]
         for i in CodeCandidateList:
             if i[0] != CodeSelection[0][0]:
                 CodeSelection.append(i)
                 break
-            else:
-                ColInd = [int(k) for k in i.split(':')[1].split(',')]
-                if not any(np.equal([int(k) for k in CodeSelection[0].split(':')[1].split(',')],
-                                     ColInd)):
-                     CodeSelection.append(i)
-                     break
+            elif not any(np.equal(CodeSelection[0][1],i[1])):
+                CodeSelection.append(i)
+                break
         CodeStr = ''
         for I in CodeSelection:
             CodeStr += '4' + I[0] + '_all_'
-            for j,J in enumerate([int(K) for K in I.split(':')[1].split(',')]):
+            for j,J in enumerate(I[1]):
                 CodeStr += str(OtherPlayers[j]) + ',' + str(J) + ':'
             CodeStr = CodeStr[:-1]
             CodeStr += '__'
@@ -249,14 +227,10 @@ class EncodingPlayer(AIPlayer):
                 raise NameError('')
         
         for i in range(self.nCards):
-            NumMatStr = c(self.InformationMatrix['NumMat'][self.SelfID,i])
-            if NumMatStr == 'x': NumMatStr = self.NumStr
-            SuitMatStr =  c(self.InformationMatrix['SuitMat'][self.SelfID,i])
-            if SuitMatStr == 'x': SuitMatStr = str(range(5))[1:-1]
-
-            SuitList =  [self.SuitStr.split(',')[l] for l in 
-                        [int(k) for k in SuitMatStr.split(',')]]
-            NumList  =  [str(int(k)) for k in NumMatStr.split(',')]
+            SuitList = [self.suits[k] for k in 
+                        MASK_VALUES[self.InformationMatrix['SuitMat'][self.SelfID,i]]]
+            NumList  = [str(k) for k in 
+                        MASK_VALUES[self.InformationMatrix['NumMat'][self.SelfID,i]]]
             PosList  = list(it.product(SuitList,NumList))
             
             SafeDiscard = True
@@ -284,15 +258,10 @@ class EncodingPlayer(AIPlayer):
         
         for i in range(self.nCards):
             PossibleCards = []
-            SuitInfo = c(self.InformationMatrix['SuitMat'][self.SelfID,i])
-            if SuitInfo == 'x': SuitInfo = str(range(5))[1:-1]
-            NumInfo = c(self.InformationMatrix['NumMat'][self.SelfID,i])
-            if NumInfo == 'x': NumInfo = c(self.NumStr)
-                
-            SuitInd = [int(k) for k in SuitInfo.split(',')]   
-            NumInd = [int(k) for k in NumInfo.split(',')] 
-            SuitList = [self.SuitStr.split(',')[k] for k in SuitInd]
-            NumList = [str(k) for k in NumInd]
+            SuitList = [self.suits[k] for k in 
+                        MASK_VALUES[self.InformationMatrix['SuitMat'][self.SelfID,i]]]
+            NumList = [str(k) for k in 
+                       MASK_VALUES[self.InformationMatrix['NumMat'][self.SelfID,i]]]
             
             for J in it.product(SuitList,NumList):
                 PossibleCards.append(J[0] + J[1])
@@ -305,41 +274,38 @@ class EncodingPlayer(AIPlayer):
         
     def CompleteHandToInt(self,r,Exclude=[],Turn='current'):
         # This function converts the standrd hand structure into a more compact
-        # form for mathematical functions
+        # form for mathematical functions. Cards which are excluded or missing
+        # are -1.
         if Turn == 'current':
             Hand = r.h
-        elif Turn == len(r.HandHistory):
-            Hand = r.h
         else:
-            Hand = r.HandHistory[Turn]
+            Hand = r.hands_at(Turn)
     
-        NumMat = np.zeros([r.nPlayers,self.nCards]).tolist()
-        SuitMat = np.zeros([r.nPlayers,self.nCards]).tolist()
+        NumMat = np.full([r.nPlayers,self.nCards],-1,dtype=np.int8)
+        SuitMat = np.full([r.nPlayers,self.nCards],-1,dtype=np.int8)
         for i in range(r.nPlayers):
-            for j,J in enumerate(Hand[i].cards):
-                if i not in Exclude:
-                    NumMat[i][j] = int(J['name'][0])
-                    SuitMat[i][j] = [k for k,K in enumerate(r.suits) if K == J['name'][1]][0]
-                else:
-                    NumMat[i][j] = 'x'
-                    SuitMat[i][j] = 'x'
-        NumMat = np.array(NumMat,dtype='S64')
-        SuitMat = np.array(SuitMat,dtype='S64')
+            if i not in Exclude:
+                for j,J in enumerate(Hand[i].cards):
+                    NumMat[i,j] = int(J['name'][0])
+                    SuitMat[i,j] = r.suits.index(J['name'][1])
         return {'NumMat':NumMat,'SuitMat':SuitMat}
         
-    def EnumerateMixedBase(self,BaseIn):
-        Output = range(BaseIn[0])
-        for i,I in enumerate(BaseIn[1:]):
-            Output = np.array(list(it.product(Output,range(I)))).tolist()
-            if i>0:
-                for j,J in enumerate(Output):
-                    Output[j] = list(it.chain(*[J[0],[J[1]]]))
-        for i,I in enumerate(Output):
-            if type(I) != list:
-                Output[i] = [Output[i]]
-        
+    def EncodeMixedBase(self,DigitsIn,BaseIn):
+        # Number of a list of digits in a mixed base, the first digit is the
+        # most significant
+        Output = 0
+        for i,I in enumerate(BaseIn):
+            Output = Output * I + int(DigitsIn[i])
         return Output
         
+    def DecodeMixedBase(self,ValueIn,BaseIn):
+        # Inverse of EncodeMixedBase
+        Output = []
+        for I in BaseIn[::-1]:
+            Output.append(ValueIn % I)
+            ValueIn //= I
+        return Output[::-1]
+        
     def InterpretCode(self,Code,DenseOtherHands):
         ResultList = []
         MixBaseList = []
@@ -356,10 +322,7 @@ class EncodingPlayer(AIPlayer):
             ResultList.append(np.sum(OtherHandMapped) % len(Map[1]))
             MixBaseList.append(len(Map[1]))
 
-        MixBaseEnum = self.EnumerateMixedBase(MixBaseList)
-        for i,I in enumerate(MixBaseEnum):
-            if np.array_equal(I,ResultList):
-                return i,ResultList
+        return self.EncodeMixedBase(ResultList,MixBaseList),ResultList
  
     def ValueFromCode(self,Code,DenseOtherHands,EncodedValue,Player):
         MixBaseList = []
@@ -367,15 +330,14 @@ class EncodingPlayer(AIPlayer):
             Position,Map,OtherHandMat,MatLabel,CustomPosition = self.CodeParse(I,DenseOtherHands)
             MixBaseList.append(len(Map[1]))
             
-        MixBaseEnum = self.EnumerateMixedBase(MixBaseList)
-        ResultList = MixBaseEnum[EncodedValue]
+        ResultList = self.DecodeMixedBase(EncodedValue,MixBaseList)
         
         BackCalcList = []
         for i,I in enumerate(Code.split('__')):
             AdjustInfoMatBool = True
             Position,Map,OtherHandMat,MatLabel,CustomPosition = self.CodeParse(I,DenseOtherHands)
             if Position != 'custom':
-                OtherValues = [int(j) for j in OtherHandMat[:,Position] if j != 'x']
+                OtherValues = [j for j in OtherHandMat[:,Position] if j != -1]
                 if len(OtherValues) != self.nPlayers - 2:
                     raise NameError('Incorrect number of elements')
 
@@ -404,20 +366,13 @@ class EncodingPlayer(AIPlayer):
                 if Position != 'custom':  
                     PlayerAddress = [Player,Position]
     
-                CurrentKnowledge = c(self.InformationMatrix[MatLabel][PlayerAddress[0],PlayerAddress[1]])
-                
-                AddedKnowledge = str(BackCalcList[-1])[1:-1]
-                if CurrentKnowledge == 'x':
-                    self.InformationMatrix[MatLabel][PlayerAddress[0],PlayerAddress[1]] = c(AddedKnowledge)
-                elif len(CurrentKnowledge) == 1:
-                    pass
-                else:
-                    CurrentSet =  [int(j) for j in AddedKnowledge.split(',')]
-                    IntSet = [int(j) for j in CurrentKnowledge.split(',')]
-                    NewSet = list(set(CurrentSet).intersection(IntSet))
-                    if len(NewSet) == 0:
+                CurrentKnowledge = self.InformationMatrix[MatLabel][PlayerAddress[0],PlayerAddress[1]]
+                AddedKnowledge = sum(1 << j for j in BackCalcList[-1])
+                if POPCOUNT[CurrentKnowledge] > 1:
+                    NewSet = CurrentKnowledge & AddedKnowledge
+                    if NewSet == 0:
                         raise NameError('Error: Possibility has been reduced to empty set')
-                    self.InformationMatrix[MatLabel][PlayerAddress[0],PlayerAddress[1]] = c(str(NewSet)[1:-1])    
+                    self.InformationMatrix[MatLabel][PlayerAddress[0],PlayerAddress[1]] = NewSet
         
     def CodeParse(self,CodeIn,DenseOtherHands):
         Position = int(CodeIn.split('_')[0][0])
@@ -429,7 +384,7 @@ class EncodingPlayer(AIPlayer):
             Position = int(Position)
             CustomPosition = ''
         MatLabel = {'N':'NumMat','S':'SuitMat'}[CodeIn.split('_')[0][1]]
-        OtherHandMat = c(DenseOtherHands[MatLabel])
+        OtherHandMat = DenseOtherHands[MatLabel]
         if CodeIn.split('_')[1] == 'all':
             if CodeIn.split('_')[0][1] == 'N':
                 Map = [[[1],[2],[3],[4],[5]],range(5)]
@@ -464,55 +419,51 @@ class EncodingPlayer(AIPlayer):
                     OutVec.append(Map[0][j])
         return OutVec
         
-    def BackOutEncodedValue(self,EncodingTable,Hint):
-        for i,I in enumerate(EncodingTable):
-            if np.array_equal(I,Hint):
-                return i
+    def BackOutEncodedValue(self,PlayingPlayer,Hint):
+        return self.EncodingIndices[PlayingPlayer][tuple(Hint)]
+    
+    def HintMask(self,HintList,MatLabel):
+        # Bitmask of the numbers or suits in a list of hints
+        return sum(self.HintBits[MatLabel].get(i,0) for i in set(HintList))
     
     def CheckEncoding(self,r,Turn):
         # Debuging function to check if an incorrect value has been encoded
         RigorousOtherHands = self.CompleteHandToInt(r,[],Turn)
         for key in RigorousOtherHands:
-            for i,I in enumerate(RigorousOtherHands[key]):
-                for j,J in enumerate(I):
-                    if self.InformationMatrix[key][i,j] != 'x':
-                        KnownSpace = [int(k) for k in self.InformationMatrix[key][i,j].split(',')]
-                        KnownIntersectActual = len(set(KnownSpace).intersection([int(k) for k in J]))
-                        if KnownIntersectActual == 0:
-                            self.InfoMatHumanReadable()  
-                            print(r.h[i].cards)
-                            print(r.h[i].cards[j])
-                            raise NameError('Incorrect value detected in encoding scheme: [' 
-                                    + str(i) + ',' + str(j) + ']')
+            Values = RigorousOtherHands[key]
+            Known = self.InformationMatrix[key]
+            Wrong = ((Values != -1) & (Known != ALL_VALUES[key]) & 
+                     ((Known >> np.maximum(Values,0)) & 1 == 0))
+            if np.any(Wrong):
+                i,j = np.argwhere(Wrong)[0]
+                self.InfoMatHumanReadable()  
+                print(r.h[i].cards)
+                print(r.h[i].cards[j])
+                raise NameError('Incorrect value detected in encoding scheme: [' 
+                        + str(i) + ',' + str(j) + ']')
 
     def InfoMatHumanReadable(self):
         print('')
-        InfoMatPrint = c(self.InformationMatrix)
-        MaxLen = 0
-        for key in InfoMatPrint:
-            for j,J in enumerate(self.InformationMatrix[key]):
-                for k,K in enumerate(J):
-                    if key == 'SuitMat' and K != 'x':
-                        Temp1 = ''
-                        for m in [int(l) for l in K.split(',')]:
-                            Temp1 += self.suits[m]
-                        InfoMatPrint[key][j,k] = Temp1
-                        K=InfoMatPrint[key][j,k]
-
-                    MaxLen = np.max([MaxLen,len(K)])
-            def PadStr(Str,Len):
-                for i in range(Len-len(Str)):
-                    Str += ' '
-                return Str
-            
+        InfoMatPrint = {}
+        for key in self.InformationMatrix:
+            InfoMatPrint[key] = []
+            for J in self.InformationMatrix[key]:
+                InfoMatPrint[key].append([])
+                for K in J:
+                    if K == ALL_VALUES[key]:
+                        PrintStr = ''
+                    elif key == 'SuitMat':
+                        PrintStr = ''.join([self.suits[m] for m in MASK_VALUES[K]])
+                    else:
+                        PrintStr = ','.join([str(m) for m in MASK_VALUES[K]])
+                    InfoMatPrint[key][-1].append(PrintStr)
+        MaxLen = np.max([len(K) for key in InfoMatPrint 
+                         for J in InfoMatPrint[key] for K in J])
+        
         for key in InfoMatPrint:
             print(key)
             for J in InfoMatPrint[key]:
                 for K in J:
-                    if K=='x':
-                        PrintStr = ''
-                    else:
-                        PrintStr = K
-                    print(PadStr(PrintStr,MaxLen) + ' |' + ' '*4,)
+                    print(K.ljust(MaxLen) + ' |' + ' '*4,)
                 print('')
             print('')
@@ -6,10 +6,36 @@ Created on Sun May 08 12:57:34 2016
 """
 
 from copy import deepcopy as c
+from collections import namedtuple
 import itertools as it
 import numpy as np
-import random, re, sys, time
-from hanabi_classes import AIPlayer
+import random, sys, time
+from hanabi_classes import AIPlayer, DebugCounter
+
+# A code is a tuple of CodeParts, each of which encodes one piece of
+# information about a card in every other hand. Type is 'N' (number) or 'S'
+# (suit), Cols holds the index of the card in each other hand (in the order of
+# the other players, -1 for the dummy card) and Groups the sets of values
+# which the part distinguishes between.
+CodePart = namedtuple('CodePart', ['Type', 'Cols', 'Groups'])
+
+# POPCOUNT[m] is the number of bits set in m, for the value masks of
+# EvaluateCodes
+POPCOUNT = np.array([bin(m).count('1') for m in range(64)])
+
+# The sizes of the subsets a hint value is split into, by number of players
+NUMSETCOMBOS = {2: [[2,5],[3,3]],
+                3: [[2,2,5],[4,5],[2,3,3]],
+                4: [[2,3,5],[3,3,3],[5,5],[2,2,2,3]],
+                5: [[2,2,2,5],[2,4,5],[2,2,3,3],[3,3,4],[2,2,2,2,2],[5,5]]}
+
+# The tables of StaticCombinatorics by number of players and hand size. These
+# are built once per process and shared by all games.
+STATICTABLES = {}
+
+# The statistics collected when debugging is turned on (wrapper option -d)
+DEBUGVALUES = ['hint codes checked against the code cache',
+               'hint codes differing from the code cache']
 
 class GeneralEncodingPlayer(AIPlayer):
 
@@ -27,7 +53,6 @@ class GeneralEncodingPlayer(AIPlayer):
         self.Initialized = False                  
  
     def play(self,r):
-        r.HandHistory.append(c(r.h))
         nPriorTurns = len(r.playHistory)
         if nPriorTurns <= r.nPlayers - 1:
             self.Startup(r)
@@ -165,27 +190,19 @@ class GeneralEncodingPlayer(AIPlayer):
         # strategies. However, introduction of a full CSPRNG would 
         # desynchronize the players. Instead, I use a shared fixed seed so all
         # players can access the same list of psudo random numbers.                
-        self.StartRandom(r.CommonSeed)
-        self.RandomSeedList = [random.randint(1,sys.maxint) for i in 
+        self.CommonSeed = r.CommonSeed
+        SeedRNG = random.Random(r.CommonSeed)
+        self.RandomSeedList = [SeedRNG.randint(1,sys.maxint) for i in 
                                range(100)]
-        self.EndRandom()
         
         # added to avoid "magic numbers"
         self.MaxCardNumber = np.max([int(i) for i in self.NumberSet])
         
         # The encoding AI considers transmitting encoded subsets to more
         # efficiently satisfy the integer constrained nature of bits        
-        if self.nPlayers == 2:
-            self.NumSetCombo = [[2,5],[3,3]]
-        elif self.nPlayers == 3:
-            self.NumSetCombo =[[2,2,5],[4,5],[2,3,3]]
-        elif self.nPlayers == 4:
-            self.NumSetCombo = [[2,3,5],[3,3,3],[5,5],[2,2,2,3]]
-        elif self.nPlayers == 5:
-            self.NumSetCombo = [[2,2,2,5],[2,4,5],[2,2,3,3],[3,3,4],
-                                [2,2,2,2,2],[5,5]]
-        else:
+        if self.nPlayers not in NUMSETCOMBOS:
             raise NameError('Invalid number of players for this AI')
+        self.NumSetCombo = NUMSETCOMBOS[self.nPlayers]
             
         # Misc. Values
         self.RunningPlayInd = -1
@@ -304,64 +321,47 @@ class GeneralEncodingPlayer(AIPlayer):
         # 2) No cheating. One's own hands are aliased as 'xx'
         # 3) Builds an 'InPlay' list which allows exclusion of cards from 
         #    encoding
-        self.HandHistory = []
-        self.DirectRecord = []
-        self.IndirectRecord = []
-        self.InPlay = []
-        for i in r.HandHistory:
-            self.HandHistory.append({})
-            self.DirectRecord.append({})
-            self.IndirectRecord.append({})
-            self.InPlay.append({})
-            for j in range(self.nPlayers):
-                # This line is somewhat unintuitive. Each player is assigned a
-                # psudo card within the framework of of the internal 
-                # information accounting. Moreover, the value of this psudo
-                # card is considered to be know. For this reason, if a code
-                # ever points to a card which should not be considered (either
-                # because a player has less than a full hand and the card does
-                # not exist or because that player has spent its last turn and
-                # revealing its cards would serve no purpose except to skew the
-                # code generation) then it can be redirected to the '-1' index
-                # as a dummy card.
-                self.HandHistory[-1][j,-1] = '1r'
-                for k in range(self.nCards):
-                    if k < len(i[j].cards):
-                        self.DirectRecord[-1][j,k] = ([str(m) for m in 
-                                                    i[j].cards[k]['direct']])
-                        self.IndirectRecord[-1][j,k] = ([str(m) for m in 
-                                                    i[j].cards[k]['indirect']])
-                        self.InPlay[-1][j,k] = True
-                        if j == self.SelfID:
-                            # This prevents players from looking at their own 
-                            # hands
-                            self.HandHistory[-1][j,k] = 'xx'
-                        else:
-                            self.HandHistory[-1][j,k] = i[j].cards[k]['name']
-                    else:
-                        self.DirectRecord[-1][j,k] = []
-                        self.IndirectRecord[-1][j,k] = []
-                        self.HandHistory[-1][j,k] = 'xx'
-                        self.InPlay[-1][j,k] = False
-        
+        # The records of past turns never change, so only the turns since the
+        # last call are added. The last record is of the current hands, and is
+        # rebuilt on every call.
+        for Record in (self.HandHistory, self.DirectRecord,
+                       self.IndirectRecord, self.InPlay):
+            del Record[-1:]
+        for Turn in range(len(self.HandHistory), r.turnNumber + 1):
+            self.AppendHandRecord(r.hands_at(Turn))
+        self.AppendHandRecord(r.h)
+        
+    def AppendHandRecord(self,i):
+        # Adds the record of the hands i to the end of the hand record
         self.HandHistory.append({})
         self.DirectRecord.append({})
         self.IndirectRecord.append({})
         self.InPlay.append({})
         for j in range(self.nPlayers):
+            # This line is somewhat unintuitive. Each player is assigned a
+            # psudo card within the framework of of the internal 
+            # information accounting. Moreover, the value of this psudo
+            # card is considered to be know. For this reason, if a code
+            # ever points to a card which should not be considered (either
+            # because a player has less than a full hand and the card does
+            # not exist or because that player has spent its last turn and
+            # revealing its cards would serve no purpose except to skew the
+            # code generation) then it can be redirected to the '-1' index
+            # as a dummy card.
             self.HandHistory[-1][j,-1] = '1r'
             for k in range(self.nCards):
-                if k < len(r.h[j].cards):
+                if k < len(i[j].cards):
                     self.DirectRecord[-1][j,k] = ([str(m) for m in 
-                                                r.h[j].cards[k]['direct']])
+                                                i[j].cards[k]['direct']])
                     self.IndirectRecord[-1][j,k] = ([str(m) for m in 
-                                                r.h[j].cards[k]['indirect']])
+                                                i[j].cards[k]['indirect']])
                     self.InPlay[-1][j,k] = True
                     if j == self.SelfID:
-                        # This prevents players from looking at their own hands
+                        # This prevents players from looking at their own 
+                        # hands
                         self.HandHistory[-1][j,k] = 'xx'
                     else:
-                        self.HandHistory[-1][j,k] = r.h[j].cards[k]['name']
+                        self.HandHistory[-1][j,k] = i[j].cards[k]['name']
                 else:
                     self.DirectRecord[-1][j,k] = []
                     self.IndirectRecord[-1][j,k] = []
@@ -376,6 +376,9 @@ class GeneralEncodingPlayer(AIPlayer):
         if CurrentTurn > 0:
             FirstEvalTurn = np.max([CurrentTurn - self.nPlayers,0])
             TurnEvalRange = range(FirstEvalTurn,CurrentTurn)
+            # Copies of each card not yet played or discarded at Turn, kept
+            # up to date as the turns are evaluated
+            self.CardCount = self.GetCountFromDiscard(r,FirstEvalTurn)
             for Turn in TurnEvalRange:
                 PlayType = r.playHistory[Turn][0]
                 CurrentPlayer = Turn % self.nPlayers
@@ -404,11 +407,9 @@ class GeneralEncodingPlayer(AIPlayer):
                                 self.InformationMatrix[i,j,'S']).difference(
                                 self.IndirectRecord[Turn][i,j]))
                                 
-                            # Use card counting methods to further restrict
-                            # possibilities.
-                            Improvement = True
-                            while Improvement:
-                                Improvement = self.CardCountInfoMat(r,Turn)
+                    # Use card counting methods to further restrict
+                    # possibilities.
+                    self.CardCountInfoMat()
                 elif PlayType == 'play' or PlayType == 'discard':
                     # Shift cards to the left and initialize the rightmost
                     # card as unknown: [1,2,3,4,5]['r','y','g','b','w']
@@ -416,6 +417,7 @@ class GeneralEncodingPlayer(AIPlayer):
                     # incorrect; however anything that points to that slot gets
                     # redirected to the dummy r1 at the -1 position.
                     self.RunningPlayInd += 1  
+                    self.CardCount[r.playHistory[Turn][1]['name']] -= 1
                     DroppedCardInd = r.DropIndRecord[self.RunningPlayInd]
                     for j in range(DroppedCardInd,self.nCards-1):
                         self.InformationMatrix[CurrentPlayer,j,'N'] = c(
@@ -431,35 +433,50 @@ class GeneralEncodingPlayer(AIPlayer):
         # Raise exception if a mistake is made
         self.CheckInfoMat(r)
     
-    def CardCountInfoMat(self,r,Turn):
+    def CardCountInfoMat(self):
         # This function uses card counting methods to restrict the 
-        # possibilities of the information matrix
-        Improvement = False
-        CardCount = self.GetCountFromDiscard(r,Turn)
+        # possibilities of the information matrix: a card cannot be X if all
+        # copies of X left are known to be elsewhere. This is repeated until
+        # nothing changes, but after the first round only the cards which
+        # might be a value whose last copy just became known are looked at
+        # again. All cards in a round see the same counts.
+        Remaining = dict(self.CardCount)
         for i in range(self.nPlayers):
             for j in range(self.nCards):
                 if (len(self.InformationMatrix[i,j,'N']) == 1 and
                     len(self.InformationMatrix[i,j,'S']) == 1):
                         CardVal = (self.InformationMatrix[i,j,'N'][0]
                                     + self.InformationMatrix[i,j,'S'][0])
-                        CardCount[CardVal] -= 1
+                        Remaining[CardVal] -= 1
         
-        for i in range(self.nPlayers):
-            for j in range(self.nCards):
+        WorkList = [(i,j) for i in range(self.nPlayers) 
+                    for j in range(self.nCards)]
+        while WorkList:
+            NewlyKnown = []
+            for i,j in WorkList:
                 N = self.InformationMatrix[i,j,'N']
                 S = self.InformationMatrix[i,j,'S']
                 if len(N) > 1 or len(S) > 1:
-                    PossibleSet = ([m[0] + m[1] for m in 
-                        list(it.product(N,S)) if 
-                        CardCount[m[0] + m[1]] > 0])
-                    Nnew = np.unique([m[0] for m in PossibleSet]).tolist()
-                    Snew = np.unique([m[1] for m in PossibleSet]).tolist()
+                    PossibleSet = [(m,M) for m in N for M in S 
+                                   if Remaining[m + M] > 0]
+                    Nnew = sorted(set([m[0] for m in PossibleSet]))
+                    Snew = sorted(set([m[1] for m in PossibleSet]))
                     if len(Nnew) < len(N) or len(Snew) < len(S):
-                        Improvement = True
-                        self.InformationMatrix[i,j,'N'] = c(Nnew)
-                        self.InformationMatrix[i,j,'S'] = c(Snew)
-
-            return Improvement
+                        self.InformationMatrix[i,j,'N'] = Nnew
+                        self.InformationMatrix[i,j,'S'] = Snew
+                        if len(Nnew) == 1 and len(Snew) == 1:
+                            NewlyKnown.append(Nnew[0] + Snew[0])
+            
+            UsedUp = set()
+            for CardVal in NewlyKnown:
+                Remaining[CardVal] -= 1
+                if Remaining[CardVal] <= 0:
+                    UsedUp.add(CardVal)
+            WorkList = [(i,j) for i in range(self.nPlayers)
+                        for j in range(self.nCards) if 
+                        any(m + M in UsedUp for m in 
+                            self.InformationMatrix[i,j,'N'] for M in 
+                            self.InformationMatrix[i,j,'S'])]
     
     def CheckInfoMat(self,r):
         # Check to see if the information matrix is wrong, and if so raise an
@@ -485,16 +502,14 @@ class GeneralEncodingPlayer(AIPlayer):
                         raise NameError('Error detected in the information matrix')
             
     def ExpandCode(self,Code):
-        # Utility function, just converts a string into several lists
-        CodeList = Code.split('__')
-        TypeList = [i.split('_')[0] for i in CodeList]
-        ColList = [i.split('_')[1] for i in CodeList]
-        GroupSetList = [i.split('_')[2] for i in CodeList]
-        EvalSetList = [[['r'],['y'],['g'],['b'],['w']] if i == 
-                    '[[r],[y],[g],[b],[w]]' else eval(i) for i in GroupSetList]
+        # Utility function, just converts a code into several lists
+        CodeList = list(Code)
+        TypeList = [i.Type for i in CodeList]
+        ColList = [list(i.Cols) for i in CodeList]
+        EvalSetList = [i.Groups for i in CodeList]
         EncodeBase = [len(i) for i in EvalSetList]
         PossibleResultList = list(it.product(*[range(i) for i in EncodeBase]))
-        return (CodeList,TypeList,ColList,GroupSetList,EvalSetList,EncodeBase,
+        return (CodeList,TypeList,ColList,EvalSetList,EncodeBase,
                 PossibleResultList)
     
     def UpdateInformationMatrix(self,Hint,Code,HintingPlayer,Turn):
@@ -502,13 +517,13 @@ class GeneralEncodingPlayer(AIPlayer):
         # calculation to convert a code and hint into the underlying encoded
         # information and transfers it into the information matrix.
         ActualResult = self.BackCalcHintedState(Hint,Code,HintingPlayer)
-        (CodeList,TypeList,ColList,GroupSetList,EvalSetList,EncodeBase,
+        (CodeList,TypeList,ColList,EvalSetList,EncodeBase,
              PossibleResultList) = self.ExpandCode(Code)
         NonHintingIDs = [m for m in range(self.nPlayers) if m != HintingPlayer]
         OtherNonHintingIDs = [m for m in NonHintingIDs if m != self.SelfID]
         CodePosOtherNonHinting = [m for m,M in enumerate(NonHintingIDs) if M != self.SelfID]
         for i,I in enumerate(CodeList):
-            CurrentColList = [int(m) for m in ColList[i].split(',')]
+            CurrentColList = ColList[i]
             CurrentOtherColList = [CurrentColList[m] for m in CodePosOtherNonHinting]
             OtherHandVals = []
             for j,J in enumerate(OtherNonHintingIDs):
@@ -539,7 +554,7 @@ class GeneralEncodingPlayer(AIPlayer):
         # Converts the actual hint (i.e. player 3 green) into the intended
         # vector of numbers (i.e. [2,0,0])
         OtherIDs = [m for m in range(self.nPlayers) if m != HintingPlayer]
-        (CodeList,TypeList,ColList,GroupSetList,EvalSetList,EncodeBase,
+        (CodeList,TypeList,ColList,EvalSetList,EncodeBase,
              PossibleResultList) = self.ExpandCode(Code)
         NumSuitSet = c(self.NumberSet)
         [NumSuitSet.append(m) for m in self.SuitSet]
@@ -554,11 +569,11 @@ class GeneralEncodingPlayer(AIPlayer):
         # determines what hint to give to provide the information corresponding
         # to the selected code.
         OtherIDs = [m for m in range(self.nPlayers) if m != HintingPlayer]
-        (CodeList,TypeList,ColList,GroupSetList,EvalSetList,EncodeBase,
+        (CodeList,TypeList,ColList,EvalSetList,EncodeBase,
              PossibleResultList) = self.ExpandCode(Code)
         ActualResult = []
         for i,I in enumerate(CodeList):
-            Columns = [int(m) for m in ColList[i].split(',')]
+            Columns = ColList[i]
             PositionInSetList = []
             for j,J in enumerate(Columns):
                 RawVal = (self.HandHistory[Turn][OtherIDs[j],J]
@@ -578,14 +593,32 @@ class GeneralEncodingPlayer(AIPlayer):
         return Hint
         
     def GenerateCode(self,TurnNumber,HintingPlayer,CardNumberGroups,progress):
+        # Returns the code for a hint, from the codes shared by all players if
+        # another player (or this one) already generated it
+        Key = (self.CommonSeed,TurnNumber,HintingPlayer,
+               tuple(sorted(progress.items())))
+        if Key in self.CodeCache and not self.collectDebug:
+            return self.CodeCache[Key]
+        Code = self.SelectCode(TurnNumber,HintingPlayer,CardNumberGroups,
+                               progress)
+        if Key not in self.CodeCache:
+            self.CodeCache[Key] = Code
+        else:
+            self.stats.add('hint codes checked against the code cache')
+            if Code != self.CodeCache[Key]:
+                self.stats.add('hint codes differing from the code cache')
+                print('Player {} generated a different code for the hint of '
+                      'player {} in turn {} than the cached one'.format(
+                      self.SelfID,HintingPlayer,TurnNumber))
+        return Code
+        
+    def SelectCode(self,TurnNumber,HintingPlayer,CardNumberGroups,progress):
         # Iterates through a number of candidate codes (using common seed 
         # Monte Carlo) and selects the best based on some evaluation criteria
         OtherIDs = [m for m in range(self.nPlayers) if m != HintingPlayer]
-        self.StartRandom(self.RandomSeedList[TurnNumber])
-        SuitSetStr = ''
-        for i in self.SuitSet:
-            SuitSetStr += '[' + i +']' + ','
-        SuitSetStr = '[' + SuitSetStr[:-1] +']'
+        # A local fixed seed RNG, so every player draws the same candidates
+        CodeRNG = random.Random(self.RandomSeedList[TurnNumber])
+        SuitGroups = [[i] for i in self.SuitSet]
         
         # For the various numerical subset groupings (including the trivial 
         # case where each value is its own subset) there is a number of DoF 
@@ -608,46 +641,53 @@ class GeneralEncodingPlayer(AIPlayer):
         
         nMCPerValidCombo = int(self.nMCCandidates/len(ValidCombinations))
             
+        # The candidates of a valid combination only differ in their columns,
+        # so they are evaluated together
         CodeCandidateList = []
+        Reductions = []
         for i in ValidCombinations:
+            Candidates = []
             for k in range(nMCPerValidCombo):
-                TrialStr = ''
+                Code = []
                 for j in i:
-                    TrialStr += j[-1]
-                    TrialStr += '_'
-                    ColComboChoice = random.randint(0,
+                    ColComboChoice = CodeRNG.randint(0,
                                             self.ColumnCombinations.shape[0]-1)
-                    Cols =c(self.ColumnCombinations[ColComboChoice,:]).tolist()
+                    Cols = self.ColumnCombinations[ColComboChoice,:].tolist()
                     ColInPlay = ([self.InPlay[TurnNumber][M,Cols[m]] 
                                     for m,M in enumerate(OtherIDs)])
                     for l,L in enumerate(ColInPlay):
                         if not L:
                             Cols[l] = -1
-                    TrialStr +=  re.sub(' ','',str(Cols)[1:-1])
-                    TrialStr += '_'
                     if j[-1] == 'S':
-                        TrialStr += SuitSetStr
+                        Groups = SuitGroups
                     else:
-                        TrialStr += re.sub(' ','',str(
-                                    CardNumberGroups[int(j[:-1])]))
-                    TrialStr += '__'
-                CodeCandidateList.append(TrialStr[:-2])          
+                        Groups = [[int(m) for m in n] for n in
+                                  CardNumberGroups[int(j[:-1])]]
+                    Code.append(CodePart(j[-1],tuple(Cols),Groups))
+                Candidates.append(tuple(Code))
+            if Candidates:
+                Reductions.extend(self.EvaluateCodes(OtherIDs,Candidates,
+                                                     progress))
+                CodeCandidateList.extend(Candidates)
     
-        BestReduction = 0
-        BestCode = CodeCandidateList[0]
-        for i,I in enumerate(CodeCandidateList):
-            Reduction = self.EvaluateCode(OtherIDs,I,progress)
-            if  Reduction > BestReduction:
-                BestReduction = Reduction
-                BestCode = I
+        # The first code with the largest reduction, if that is positive
+        BestIndex = int(np.argmax(Reductions))
+        if Reductions[BestIndex] > 0:
+            return CodeCandidateList[BestIndex]
+        return CodeCandidateList[0]
 
-        self.EndRandom()
-        return BestCode
-
-    def EvaluateCode(self,OtherIDs,Code,progress):
-        # This function takes a code and returns an evaluation of the merit of
-        # said code. Currently this takes the form of a degree of freedom (DoF)
+    def EvaluateCodes(self,OtherIDs,Codes,progress):
+        # This function takes codes which only differ in their columns and
+        # returns an array with an evaluation of the merit of each code.
+        # Currently this takes the form of a degree of freedom (DoF)
         # minimization weighted by some coefficients (AMaster)
+        #
+        # The DoF reduction of a code is a sum with a term for each other
+        # player and each column used for that player, first for the number
+        # parts of the code and then for the suit parts. The terms are
+        # computed for all codes at once, and added up in the same order (the
+        # columns of a player in list(set(...)) order) and the same way, so
+        # the sums are exactly those of evaluating the codes one by one.
     
         # Weighting coefficients for determining set reduction. Currently just
         # naively the number of each card number in the deck
@@ -658,61 +698,89 @@ class GeneralEncodingPlayer(AIPlayer):
         for i in D:
             AMaster[i-1] = AMaster[i-1] / 2.
         
-        DoFReductionList = []
-        
-        CodeList = Code.split('__')
-        TypeList = [i.split('_')[0] for i in CodeList]
-        ColList = [i.split('_')[1] for i in CodeList]
-        GroupSetList = [i.split('_')[2] for i in CodeList]
-        
+        TypeList = [i.Type for i in Codes[0]]
         NumIndex = [i for i,I in enumerate(TypeList) if I == 'N']
         SuitIndex = [i for i,I in enumerate(TypeList) if I == 'S']
-        
-        # Calculate numeric DoF reduction
+        # Columns in the order in which a set of them is iterated over (small
+        # integers never collide in a set)
+        ColOrder = list(set(range(-1,self.nCards)))
+        # Cols[code,part,player]
+        Cols = np.array([[I.Cols for I in Code] for Code in Codes])
+        # UsedCols[code,part,player,col] tells whether the part uses column
+        # ColOrder[col] of the player
+        UsedCols = Cols[:,:,:,None] == np.array(ColOrder)[None,None,None,:]
+        
+        # Number terms. Sets of card numbers are stored as masks, with bit
+        # m-1 standing for card number m.
+        nValues = len(AMaster)
+        NumTerms = np.zeros((len(Codes),0))
+        NumUsed = np.zeros((len(Codes),0),dtype=bool)
         if len(NumIndex) > 0:
-            NumColList = [ColList[i].split(',') for i in NumIndex]
-            CodeNumSets = [eval(GroupSetList[i]) for i in NumIndex]
-            NumColListSwitch = ([[int(NumColList[i][j]) 
-                                for i in range(len(NumColList))] 
-                                for j in range(len(NumColList[0]))])
-            # This is the list of columns in each row that I need to check to
-            # determine the reduction in uncertainty for a given code
-            ColCheckList = [list(set(i)) for i in NumColListSwitch]
+            # PartMasks[part,m] is the group of the part containing card number
+            # m+1, and RestrictMasks[k,m] the intersection of these groups for
+            # the subset of parts in the bits of k
+            PartMasks = np.zeros((len(NumIndex),nValues),dtype=int)
+            for i,I in enumerate(NumIndex):
+                for Group in Codes[0][I].Groups:
+                    for m in Group:
+                        PartMasks[i,m-1] = sum(1 << (n-1) for n in Group)
+            RestrictMasks = np.zeros((1 << len(NumIndex),nValues),dtype=int)
+            RestrictMasks[0,:] = (1 << nValues) - 1
+            for k in range(1,1 << len(NumIndex)):
+                Lowest = (k & -k).bit_length() - 1
+                RestrictMasks[k,:] = (RestrictMasks[k & (k-1),:] & 
+                                      PartMasks[Lowest,:])
             
-            for i,I in enumerate(ColCheckList):
-                for j,J in enumerate(I):
-                    InitialInfoSet = [int(m) for m in
-                                     self.InformationMatrix[OtherIDs[i],J,'N']]
-                    AParticular = [AMaster[m-1] for m in InitialInfoSet]
-                    nPosFinal = []
-                    for PosValInd,PossibleValue in enumerate(InitialInfoSet):
-                        InfoSetRestrict = set(c(InitialInfoSet))
-                        for k,K in enumerate(NumColListSwitch[i]):
-                            if K == J:
-                                InfoSetRestrict = InfoSetRestrict.intersection(
-                                            [m for m in CodeNumSets[k] if 
-                                            PossibleValue in m][0])
-                       
-                        nPosFinal.append(len(InfoSetRestrict))
-                    DoFReduction = len(InitialInfoSet) - (
-                        1./np.sum(AParticular)*np.sum([AParticular[m]*
-                        nPosFinal[m] for m in range(len(AParticular))]))
-                    DoFReductionList.append(DoFReduction)
-                    
-        # Calculate suit DoF reduction
+            # InitialMasks[player,col] is the initial information set and
+            # Weights[player,col,m] the weight of card number m+1 if it is in
+            # there
+            InitialMasks = np.zeros((len(OtherIDs),len(ColOrder)),dtype=int)
+            Weights = np.zeros((len(OtherIDs),len(ColOrder),nValues))
+            for i,I in enumerate(OtherIDs):
+                for j,J in enumerate(ColOrder):
+                    for m in self.InformationMatrix[I,J,'N']:
+                        InitialMasks[i,j] |= 1 << (int(m)-1)
+                        Weights[i,j,int(m)-1] = AMaster[int(m)-1]
+            
+            # Terms[player,col,k] is the DoF reduction for a column which is
+            # used by the subset of parts k
+            nPosFinal = POPCOUNT[InitialMasks[:,:,None,None] & 
+                                 RestrictMasks[None,None,:,:]]
+            AParticularSum = np.sum(Weights,axis=2)
+            WeightedSum = np.sum(Weights[:,:,None,:] * nPosFinal,axis=3)
+            Terms = (POPCOUNT[InitialMasks][:,:,None] - 
+                     1./AParticularSum[:,:,None] * WeightedSum)
+            
+            PartBits = np.array([1 << i for i in range(len(NumIndex))])
+            Subsets = np.sum(UsedCols[:,NumIndex,:,:] * 
+                             PartBits[None,:,None,None],axis=1)
+            PlayerIndex = np.arange(len(OtherIDs))[None,:,None]
+            ColIndex = np.arange(len(ColOrder))[None,None,:]
+            NumTerms = Terms[PlayerIndex,ColIndex,Subsets].reshape(
+                                                            len(Codes),-1)
+            NumUsed = (Subsets > 0).reshape(len(Codes),-1)
+        
+        # Suit terms
+        SuitTerms = np.zeros((len(Codes),0))
+        SuitUsed = np.zeros((len(Codes),0),dtype=bool)
         if len(SuitIndex) > 0:
-            SuitColList = [ColList[i].split(',') for i in SuitIndex]
-            SuitColListSwitch = ([[int(SuitColList[i][j]) 
-                                for i in range(len(SuitColList))] 
-                                for j in range(len(SuitColList[0]))])
-            ColCheckList = [list(set(i)) for i in SuitColListSwitch]
-            for i,I in enumerate(ColCheckList):
-                for j,J in enumerate(I):
-                    InitialInfoSet = [m for m in
-                                     self.InformationMatrix[OtherIDs[i],J,'S']]
-                    DoFReduction = len(InitialInfoSet) - 1
-                    DoFReductionList.append(DoFReduction)
-        return np.sum(DoFReductionList)
+            Terms = np.array([[len(self.InformationMatrix[I,J,'S']) - 1
+                               for J in ColOrder] for I in OtherIDs])
+            SuitTerms = np.tile(Terms.reshape(1,-1),(len(Codes),1))
+            SuitUsed = np.any(UsedCols[:,SuitIndex,:,:],axis=1).reshape(
+                                                            len(Codes),-1)
+        
+        # Add up the terms of the columns which are used, grouping the codes
+        # by their number of terms
+        AllTerms = np.concatenate((NumTerms,SuitTerms),axis=1)
+        AllUsed = np.concatenate((NumUsed,SuitUsed),axis=1)
+        nTerms = np.sum(AllUsed,axis=1)
+        Reductions = np.zeros(len(Codes))
+        for n in np.unique(nTerms):
+            Rows = np.nonzero(nTerms == n)[0]
+            Reductions[Rows] = np.add.reduce(
+                AllTerms[Rows][AllUsed[Rows]].reshape(len(Rows),n),axis=1)
+        return Reductions
 
 
 
@@ -726,25 +794,24 @@ class GeneralEncodingPlayer(AIPlayer):
                 raise NameError('Encoding AI must only play with other' + 
                                 ' encoders')                                
         self.InitializeConstants(r)
+        if len(r.playHistory) == 0:
+            # The code of a hint only depends on public information, so all
+            # players share the codes generated in this round (see
+            # GenerateCode). With debugging on, every player still generates
+            # every code, to check the shared ones.
+            CodeCache = {}
+            if self.collectDebug and 'gencoder' not in r.debug:
+                r.debug['gencoder'] = DebugCounter(DEBUGVALUES)
+            Stats = r.debug['gencoder'] if self.collectDebug else None
+            for i in r.PlayerRecord:
+                i.CodeCache = CodeCache
+                i.stats = Stats
+        # The hand record (see GenerateHandRecord) of this game
+        self.HandHistory = []
+        self.DirectRecord = []
+        self.IndirectRecord = []
+        self.InPlay = []
 
-    def StartRandom(self,seed):
-        # This function initializes the fixed seed random method used by
-        # players. There is a concern that the use of this method, particularly
-        # the setting of a fixed seed, may bias other functions which wish to 
-        # call random. For this reason, the RNG state is recorded at the start 
-        # of the player call; the RNG state will then be set back to this state
-        # before the player concludes it's turn. This will prevent the fixed
-        # seed method from interacting with other random calls outside of the
-        # AI program.
-        self.RNG_State = random.getstate()
-        random.seed(seed)
-        
-    def EndRandom(self):
-        # This function is responsible for returning the RNG to the same state
-        # as when it entered the AI        
-        random.setstate(self.RNG_State)
-        
-    
     def StaticCombinatorics(self):
         # This function performs the combinatoric math which only needs to be
         # done once (even across replicate games)
@@ -763,9 +830,13 @@ class GeneralEncodingPlayer(AIPlayer):
         # determined cards is fine; by contrast encoding a number less than
         # nPlayers - 1 in a single value would further conbinatorically grow
         # the number of choices. (Unnecessarily)
-        IndexVector = [i for i in range(self.nCards)]
-        self.ColumnCombinations = np.array(list(it.product(IndexVector,
+        if (self.nPlayers,self.nCards) not in STATICTABLES:
+            IndexVector = [i for i in range(self.nCards)]
+            ColumnCombinations = np.array(list(it.product(IndexVector,
                                                     repeat=self.nPlayers-1)))
+            ColumnCombinations.setflags(write=False)
+            STATICTABLES[self.nPlayers,self.nCards] = ColumnCombinations
+        self.ColumnCombinations = STATICTABLES[self.nPlayers,self.nCards]
                                                     
     def GetPDO(self,progress):
         # Utility to get the set of playable (P), discardable (D),
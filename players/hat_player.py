@@ -18,18 +18,76 @@ from copy import copy
 # If true, the cluer can tell the player to discard, including cards which might be useful later
 # If false, the clued player can clue instead of discarding
 MODIFIEDACTION = True
-DEBUG = True
+# The statistics collected when debugging is turned on (wrapper option -d)
 DEBUGVALUES = ['play 5 instead', 'someone cannot clue, but I have a play', 'unsafe discard at 0 clues', 'safe discard at 0 clues', \
     'clue blocked', 'I misplayed', 'BUG: instructed to discard at 8 clues', 'BUG: instructed to clue with 0 clues', 'instructing to discard critical card',
     'player did wrong action at >0 clues', 'player did not play', 'player played wrong card', 'wrong action: discard at 0 clues', 'someone performed the wrong action',
     'player played when not instructed to', 'we can use the clue from a 5 to reach another player in endgame', 'yolo', 'successful yolo', 'unsuccessful yolo']
 
 
+# NUMBER_ACTIONS[n] is the action with number n (see number_to_action)
+NUMBER_ACTIONS = [('hint', 0)] + [('play', 4 - n) for n in range(1, 5)] + [('discard', 8 - n) for n in range(5, 9)]
+# ACTION_NUMBERS[action] is the number of an action (see action_to_number).
+# The position of a played or discarded card (card['position']) counts from 1, so slot 4 occurs as well.
+ACTION_NUMBERS = {('hint', 0) : 0}
+ACTION_NUMBERS.update({('play', slot) : 4 - slot for slot in range(5)})
+ACTION_NUMBERS.update({('discard', slot) : 8 - slot for slot in range(5)})
+
+def not_newest_clue(newest, cardname):
+    """A clue which touches the card `cardname` but not the card `newest`,
+    or False if there is no such clue"""
+    if cardname[0] != newest[0]:
+        return cardname[0]
+    if cardname[1] != newest[1] and newest[1] != RAINBOW_SUIT:
+        if cardname[1] != RAINBOW_SUIT:
+            return cardname[1]
+        if newest[1] != VANILLA_SUITS[0]:
+            return VANILLA_SUITS[0]
+        return VANILLA_SUITS[1]
+    return False
+
+# NOT_NEWEST_CLUES[newest, cardname] is not_newest_clue(newest, cardname)
+NOT_NEWEST_CLUES = {(newest, cardname) : not_newest_clue(newest, cardname) for newest in CARD_NAMES for cardname in CARD_NAMES}
+
+# lookup tables of clue_tables, by number of players and suits
+CLUE_TABLES = {}
+
+def clue_tables(nPlayers, suits):
+    """Lookup tables for clue_to_number and number_to_clue, computed once for
+    every number of players and set of suits. Returns (kinds, numbers, targets):
+    kinds[value] is 0 for a rank clue and 1 for a color clue,
+    numbers[clueGiver][target][x] is the clue number of a clue of kind x (2 is not touching the newest card)
+    and targets[clueGiver][cluenumber] is the pair (target, x) of a clue number (target is None
+    if the clue can go to any player)."""
+    if (nPlayers, suits) in CLUE_TABLES:
+        return CLUE_TABLES[nPlayers, suits]
+    kinds = {value : int(value in suits) for value in RANKS + suits}
+    numbers = [[None] * nPlayers for clueGiver in range(nPlayers)]
+    targets = [{} for clueGiver in range(nPlayers)]
+    for clueGiver in range(nPlayers):
+        for target in range(nPlayers):
+            skipped = (target - clueGiver - 1) % nPlayers
+            if nPlayers == 4:
+                numbers[clueGiver][target] = [3 * skipped + x for x in range(3)]
+            else:
+                numbers[clueGiver][target] = [2 * skipped, 2 * skipped + 1, 8]
+            for x in range(3):
+                if target != clueGiver and (nPlayers == 4 or x < 2):
+                    targets[clueGiver][numbers[clueGiver][target][x]] = target, x
+        if nPlayers != 4:
+            targets[clueGiver][8] = None, 2
+    CLUE_TABLES[nPlayers, suits] = kinds, numbers, targets
+    return kinds, numbers, targets
+
 ### General utility functions, maybe these should be moved to bot_utils.py
 def prev_cardname(cardname):
     """The card with cardname below `cardname`. Doesn't check whether there is a card below"""
     return str(int(cardname[0]) - 1) + cardname[1]
 
+def frozen_dict(dic):
+    """A hashable copy of `dic`, used in keys of the shared action cache."""
+    return frozenset(dic.items())
+
 def list_between(begin, end, r):
     """Returns the list of players from begin to end (inclusive)."""
     if begin <= end:
@@ -42,6 +100,9 @@ class HatPlayer(AIPlayer):
     def get_name(cls):
         return 'hat'
 
+    # whether my last play was a yolo (only tracked for the debugging statistics)
+    yolo = False
+
     ### utility functions specific to this strategy
 
     def number_to_action(self, n):
@@ -52,18 +113,12 @@ class HatPlayer(AIPlayer):
         5 means discard newest
         6 means discard 2nd newest etc.
         """
-        if n == 0:
-            return 'hint', 0
-        elif n <= 4:
-            return 'play', 4 - n
-        return 'discard', 8 - n
+        return NUMBER_ACTIONS[n]
 
     def action_to_number(self, action):
         """Returns number corresponding to an action as represented in this bot
         (where the second component is the *position* of the card played/discarded). """
-        if action[0] == 'hint':
-            return 0
-        return 4 - action[1] + (0 if action[0] == 'play' else 4)
+        return ACTION_NUMBERS[action]
 
     def interpret_external_action(self, action):
         """Interprets an action in the log. Returns a pair action, card
@@ -90,32 +145,21 @@ class HatPlayer(AIPlayer):
         cards = r.h[target].cards
         if cards[-1]['indirect'] and cards[-1]['indirect'][-1] == value:
             x = 2
-        elif value in r.suits:
-            x = 1
-        else:
-            x = 0
-        if r.nPlayers == 4:
-            return 3 * ((target - clueGiver - 1) % r.nPlayers) + x
-        elif x == 2:
-            return 8
         else:
-            return 2 * ((target - clueGiver - 1) % r.nPlayers) + x
+            x = self.clue_kinds[value]
+        return self.clue_numbers[clueGiver][target][x]
 
     def number_to_clue(self, cluenumber, me, r):
         """Returns number corresponding to a clue."""
-        x = cluenumber % (3 if r.nPlayers == 4 else 2)
-        if r.nPlayers == 4:
-            target = (me + 1 + cluenumber // 3) % r.nPlayers
-        elif cluenumber != 8:
-            target = (me + 1 + cluenumber // 2) % r.nPlayers
-        else: # in 5 players, to convey clue number 8 we clue any non-newest card
+        target, x = self.clue_targets[me][cluenumber]
+        if target is None: # in 5 players, to convey clue number 8 we clue any non-newest card
             for target in range(r.nPlayers):
                 if target != me:
                     cards = r.h[target].cards
                     clue = self.clue_not_newest(cards, r)
                     if clue: return (target, clue)
             # this can theoretically happen, but will never happen in practice
-            if DEBUG: r.debug['clue blocked'] += 1
+            if self.collectDebug: self.stats.add('clue blocked')
             target = next(me, r)
             return (target, r.h[target].cards[-1]['name'][0])
         assert target != me
@@ -129,7 +173,7 @@ class HatPlayer(AIPlayer):
         if x == 2:
             clue = self.clue_not_newest(cards, r)
             if clue: return (target, clue)
-            if DEBUG: r.debug['clue blocked'] += 1
+            if self.collectDebug: self.stats.add('clue blocked')
             # if the clue is blocked, we currently just return another clue.
             # todo: We should add a list of blocked clues to modified_action, and give the player any non-blocked action
             clue = cards[-1]['name'][0]
@@ -139,16 +183,10 @@ class HatPlayer(AIPlayer):
         """Return any clue that does not touch the newest card (slot -1) in `cards`.
         Returns False if no such clue exists"""
         newest = cards[-1]['name']
-        for i in range(len(cards)-1):
-            cardname = cards[i]['name']
-            if cardname[0] != newest[0]:
-                return cardname[0]
-            if cardname[1] != newest[1] and newest[1] != RAINBOW_SUIT:
-                if cardname[1] != RAINBOW_SUIT:
-                    return cardname[1]
-                if newest[1] != VANILLA_SUITS[0]:
-                    return VANILLA_SUITS[0]
-                return VANILLA_SUITS[1]
+        for card in cards[:-1]:
+            clue = NOT_NEWEST_CLUES[newest, card['name']]
+            if clue:
+                return clue
         return False
 
     def recover_hand(self, player, r):
@@ -235,8 +273,8 @@ class HatPlayer(AIPlayer):
             d['plays'][player] = (action, card)
         if me == player:
             if action[0] != 'play': return
-            if card['misplayed'] and DEBUG:
-                r.debug['I misplayed'] += 1
+            if card['misplayed'] and self.collectDebug:
+                self.stats.add('I misplayed')
             self.resolve_clue(action, cardname, player, r)
             if self.given_clues: # this can be false if you yolo in the endgame
                 self.resolve_given_clues(me, r)
@@ -248,15 +286,15 @@ class HatPlayer(AIPlayer):
             self.given_clues[0]['value'] -= self.resolve_action(action, cardname, player, r)
             self.given_clues[0]['value'] = self.given_clues[0]['value'] % 9
         else:
-            if DEBUG:
+            if self.collectDebug:
                 diff = (player - me - 1) % r.nPlayers
                 if diff < len(self.next_player_actions):
                     exp_action = self.next_player_actions[diff]
                     if not (exp_action == action or (exp_action[0] == 'discard' and action[0] == 'hint')):
                         if action[0] == 'discard' and exp_action[0] == 'hint' and r.hints == 1:
-                            r.debug['wrong action: discard at 0 clues'] += 1
+                            self.stats.add('wrong action: discard at 0 clues')
                         else:
-                            r.debug['player did wrong action at >0 clues'] += 1
+                            self.stats.add('player did wrong action at >0 clues')
                             # print(me, "thinks",player,"who did", action,"should do", exp_action, "other actions:",self.next_player_actions, "hints",r.hints, "turnnumber",r.turnNumber)
                             # r.debug['stop'] = 0
 
@@ -267,11 +305,11 @@ class HatPlayer(AIPlayer):
                     self.player_to_card.pop(player)
                     self.card_to_player.pop(cardname)
                 else:
-                    if DEBUG:
+                    if self.collectDebug:
                         if action[0] != 'play':
-                            r.debug['player did not play'] += 1
+                            self.stats.add('player did not play')
                         else:
-                            r.debug['player played wrong card'] += 1
+                            self.stats.add('player played wrong card')
                     # print(me, "thinks that player", player, "didn't play the right card. He did",action,"cardname",cardname,"dics",
                     #     self.player_to_card,self.card_to_player,"current hand",names(r.h[player].cards))
                     cardname = self.player_to_card[player][1]
@@ -283,8 +321,8 @@ class HatPlayer(AIPlayer):
                     # todo: check if the done action was a correct play, and modify progress accordingly
                     self.clued_progress_current[cardname[1]] = r.progress[cardname[1]]
                     self.clued_progress[cardname[1]] = r.progress[cardname[1]]
-            # elif action[0] == 'play' and (player - me - 1) % r.nPlayers < len(self.next_player_actions) and DEBUG:
-            #     r.debug['player played when not instructed to'] += 1 # if this actually happens, we should modify progress
+            # elif action[0] == 'play' and (player - me - 1) % r.nPlayers < len(self.next_player_actions) and self.collectDebug:
+            #     self.stats.add('player played when not instructed to') # if this actually happens, we should modify progress
 
         if action[0] != 'hint':
             return
@@ -317,7 +355,7 @@ class HatPlayer(AIPlayer):
             # In that case we don't want to decrease clued_progress_current.
             if self.clued_progress_current[cardname[1]] < int(cardname[0]):
                 self.clued_progress_current[cardname[1]] = int(cardname[0])
-        if DEBUG and action[0] != 'hint' and action[1] < len(r.h[player].cards):
+        if (self.writeNotes or self.collectDebug) and action[0] != 'hint' and action[1] < len(r.h[player].cards):
             card = r.h[player].cards[action[1]]
             if card['name'] == cardname:
                 s = ('note', self.me, card['cardNo'])
@@ -431,9 +469,9 @@ class HatPlayer(AIPlayer):
             # print("player",me,"sees that the clue of player",cluer,"was value",self.given_clues[0]['value'],
             # "and other players have done",value,"so remaining is",(self.given_clues[0]['value'] - value) % 9)
             self.given_clues[0]['value'] = (self.given_clues[0]['value'] - value) % 9
-            if DEBUG and next(me, r) == r.whoseTurn and self.given_clues[0]['value'] != 0:
+            if self.collectDebug and next(me, r) == r.whoseTurn and self.given_clues[0]['value'] != 0:
                 # this can happen if someone didn't perform the right action, or the cluer didn't give the correct clue
-                r.debug['someone performed the wrong action'] += 1
+                self.stats.add('someone performed the wrong action')
             return
         # If I just played, the modified player might be after me. In that case,
         # I now need to determine the action assigned to the modified player
@@ -470,8 +508,17 @@ class HatPlayer(AIPlayer):
         `discardpile` the discard pile when the clue was given
         This function assumes that the action happens in the future.
         """
-        # this is never called on a player's own hand
+        # this is never called on a player's own hand, so the shared cache never
+        # hands a seat an action computed from its own cards
         assert self != r.PlayerRecord[player]
+        key = ('standard', cluer, player, tuple(dont_play), frozen_dict(progress),
+            frozen_dict(card_to_player), frozen_dict(player_to_card), tuple(discardpile), frozen_dict(self.clued_progress))
+        if key not in self.shared_actions:
+            self.shared_actions[key] = self.compute_standard_action(cluer, player, dont_play, progress, card_to_player, player_to_card, discardpile, r)
+        return self.shared_actions[key]
+
+    def compute_standard_action(self, cluer, player, dont_play, progress, card_to_player, player_to_card, discardpile, r):
+        """Computes standard_action without looking in the shared cache."""
         # if the player is already playing, don't change the clue
         if player in player_to_card:
             return "play", player_to_card[player][0]
@@ -519,6 +566,14 @@ class HatPlayer(AIPlayer):
 
     def safe_discard(self, cards, progress):
         """Discard in the standard action"""
+        # this only depends on the names of the cards, so it can be shared
+        key = ('discard', tuple(names(cards)), frozen_dict(progress))
+        if key not in self.shared_actions:
+            self.shared_actions[key] = self.compute_safe_discard(cards, progress)
+        return self.shared_actions[key]
+
+    def compute_safe_discard(self, cards, progress):
+        """Computes safe_discard without looking in the shared cache."""
         # Do I want to discard?
         discardCards = get_played_cards(cards, progress)
         if discardCards: # discard a card which is already played (the oldest)
@@ -596,12 +651,12 @@ class HatPlayer(AIPlayer):
                 playablefives = [card for card in get_plays(cards, progress)
                         if card['name'][0] == '5']
                 if playablefives:
-                    if DEBUG:
-                        r.debug['play 5 instead'] += 1
+                    if self.collectDebug:
+                        self.stats.add('play 5 instead')
                     return 'play', cards.index(playablefives[0])
                 else:
-                    if DEBUG:
-                        r.debug["someone cannot clue, but I have a play"] += 1
+                    if self.collectDebug:
+                        self.stats.add("someone cannot clue, but I have a play")
                     if self.endgame <= 0:
                         action = self.safe_discard(cards, progress)
                         if action[0] == 'discard': return action
@@ -686,8 +741,8 @@ class HatPlayer(AIPlayer):
         # we need 1 fewer hint if someone inbetween plays
         if is_between(playing_player, self.modified_player, useful_players[0]):
             needed_hints -= 1
-            if DEBUG:
-                r.debug['we can use the clue from a 5 to reach another player in endgame'] += 1
+            if self.collectDebug:
+                self.stats.add('we can use the clue from a 5 to reach another player in endgame')
             #this seems to rarely happen
             #r.debug['stop'] = 0
             #print("one fewer")
@@ -731,8 +786,8 @@ class HatPlayer(AIPlayer):
     def critical_discard(self, cards, r):
         """Find the card with the highest rank card to discard.
         This function is only called when all cards are critical."""
-        if DEBUG:
-            r.debug['instructing to discard critical card'] += 1
+        if self.collectDebug:
+            self.stats.add('instructing to discard critical card')
         return 'discard', cards.index(find_highest(cards))
 
     ### The main function which is called every turn
@@ -748,20 +803,23 @@ class HatPlayer(AIPlayer):
         if r.turnNumber == 0:
             if r.nPlayers <= 3:
                 raise NameError('This AI works only with at least 4 players.')
-            if DEBUG:
-                for s in DEBUGVALUES:
-                    if s not in r.debug:
-                        r.debug[s] = 0
-                # for i in [0, 1]:
-                #     for j in range(4):
-                #         s = 'yolo: played ' + str(i) + ', correct was ' + str(j)
-                #         if s not in r.debug:
-                #             r.debug[s] = 0
+            # the debugging statistics of all rounds are collected in one counter
+            if self.collectDebug and 'hat' not in r.debug:
+                r.debug['hat'] = DebugCounter(DEBUGVALUES)
+            stats = r.debug['hat'] if self.collectDebug else None
+            tables = clue_tables(n, r.suits)
+            # standard actions and safe discards computed this turn, shared by all players
+            shared_actions = {}
             for i in range(n):
                 # initialize variables which contain the memory of this player.
                 # These are updated after every move of any player
                 r.PlayerRecord[i].initialize_memory(r)
+                r.PlayerRecord[i].shared_actions = shared_actions
+                r.PlayerRecord[i].stats = stats
+                r.PlayerRecord[i].clue_kinds, r.PlayerRecord[i].clue_numbers, r.PlayerRecord[i].clue_targets = tables
         else:
+            # all hands and piles may have changed since the previous turn
+            self.shared_actions.clear()
             # everyone takes some time to think about the meaning of previously
             # given clues
             for i in range(n):
@@ -778,32 +836,26 @@ class HatPlayer(AIPlayer):
             # if I have a known useless card in slot 0, play slot 1
             if self.useless_card is not None and self.useless_card in r.h[me].cards and not r.h[me].cards.index(self.useless_card):
                 slot = 1
-            if DEBUG:
-                r.debug['yolo'] += 1
-                # peek at my hand to test if my yolo is successful for debugging (I cannot check it next turn if this is the last turn of the game)
-                if is_playable(r.h[me].cards[slot], r.progress):
-                    r.debug['successful yolo'] += 1
-                else:
-                    r.debug['unsuccessful yolo'] += 1
-                # s = 'yolo: played ' + str(slot) + ', correct was ' + str([is_playable(card, r.progress) for card in r.h[me].cards].index(True))
-                # r.debug[s] += 1
+            if self.collectDebug:
+                self.stats.add('yolo')
+                self.yolo = True # whether it works out is counted in on_play or on_misplay
             return self.execute_action(('play', slot), r)
         if myaction[0] == 'discard' and (not r.hints or (me == self.modified_player and MODIFIEDACTION)):
             if r.hints != 8:
                 return self.execute_action(myaction, r)
-            elif DEBUG: # this can happen with a blocked clue
-                r.debug['BUG: instructed to discard at 8 clues']
+            elif self.collectDebug: # this can happen with a blocked clue
+                self.stats.add('BUG: instructed to discard at 8 clues')
 
 
 
         if not r.hints: # I cannot hint without clues
             x = 3
-            if DEBUG and me == self.modified_player:
-                r.debug['BUG: instructed to clue with 0 clues'] += 1
+            if self.collectDebug and me == self.modified_player:
+                self.stats.add('BUG: instructed to clue with 0 clues')
             if self.useless_card is not None and self.useless_card in r.h[me].cards:
                 x = r.h[me].cards.index(self.useless_card)
-                if DEBUG: r.debug['safe discard at 0 clues'] += 1
-            elif DEBUG: r.debug['unsafe discard at 0 clues'] += 1
+                if self.collectDebug: self.stats.add('safe discard at 0 clues')
+            elif self.collectDebug: self.stats.add('unsafe discard at 0 clues')
             return self.execute_action(('discard', x), r)
 
     # I'm am considering whether to give a clue
@@ -894,3 +946,15 @@ class HatPlayer(AIPlayer):
             return myaction
         else:
             return myaction[0], cards[myaction[1]]
+
+    def on_play(self, r, event):
+        """Count my yolo as successful (debugging statistics)."""
+        if self.yolo and event.player == self.me:
+            self.yolo = False
+            self.stats.add('successful yolo')
+
+    def on_misplay(self, r, event):
+        """Count my yolo as unsuccessful (debugging statistics)."""
+        if self.yolo and event.player == self.me:
+            self.yolo = False
+            self.stats.add('unsuccessful yolo')
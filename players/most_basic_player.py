@@ -25,7 +25,7 @@ class MostBasicPlayer(AIPlayer):
         myPlays = deduce_plays(cards, progress, r.suits)
 
         if myPlays != []:
-            return 'play', random.choice(myPlays)
+            return 'play', self.rng.choice(myPlays)
 
         if r.hints > 0:
             # look around at each other hand to see if anything is playable
@@ -37,8 +37,8 @@ class MostBasicPlayer(AIPlayer):
 
                 if plays != []:
                     # hint a random attribute about a random card in that hand
-                    hintTarget = random.choice(plays)
-                    return 'hint', (i, random.choice(hintTarget['name']))
+                    hintTarget = self.rng.choice(plays)
+                    return 'hint', (i, self.rng.choice(hintTarget['name']))
 
         # alright, don't know what to do, let's toss
-        return 'discard', random.choice(cards)
+        return 'discard', self.rng.choice(cards)
@@ -70,7 +70,7 @@ class NewestCardPlayer(AIPlayer):
         myPlayableCards = deduce_plays(cards, progress, r.suits)
 
         if myPlayableCards != []:
-            return 'play', random.choice(myPlayableCards)
+            return 'play', self.rng.choice(myPlayableCards)
  
         if r.hints > 0:
             # look around at each other hand to see if anything is playable
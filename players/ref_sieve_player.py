@@ -3,10 +3,26 @@
 
 from hanabi_classes import *
 from bot_utils import is_cardname_playable as is_playable
-from copy import deepcopy
+from copy import copy
+from time import time
+
+# The possibilities of a card are a bitmask with bit CARD_IDS[identity] set for
+# each identity it can be.  CLUE_MASKS has the identities each clue value
+# touches.  SUIT_BITS has the lowest bit of every suit, RANK_BITS the bits of
+# the first suit.
+CLUE_MASKS = dict((value, sum(1 << i for i, identity in enumerate(CARD_NAMES)
+                              if value in identity))
+                  for value in ALL_SUITS + RANKS)
+SUIT_SHIFTS = dict((suit, len(RANKS) * i) for i, suit in enumerate(ALL_SUITS))
+SUIT_BITS = sum(1 << shift for shift in SUIT_SHIFTS.values())
+RANK_BITS = (1 << len(RANKS)) - 1
 
 
 class ReferentialSievePlayer(AIPlayer):
+    handHistoryWindow = 0 # Only looks at the current hands.
+    # Seconds a decision may take (e.g. against humans), or None for no limit.
+    # Once it is up, no more moves are simulated (see find_best_move).
+    decisionTime = None
 
     @classmethod
     def get_name(cls):
@@ -17,49 +33,59 @@ class ReferentialSievePlayer(AIPlayer):
         super(ReferentialSievePlayer, self).__init__(*args)
 
     def play(self, r):
-        r.HandHistory.append(
-            [newest_to_oldest(deepcopy(hand.cards)) for hand in r.h])
-        recent_actions = r.playHistory[-r.nPlayers:]
-        if len(recent_actions) < r.nPlayers:
-            self.global_understanding = GlobalUnderstanding()
-        initial_actor = r.whoseTurn - len(recent_actions)
-        for i, action in enumerate(recent_actions):
-            actor = (initial_actor + i + r.nPlayers) % r.nPlayers
-            action_type, action = action
-            if action_type == 'play':
-                self.global_understanding.play(
-                    actor, action["name"], action["position"] - 1)
-            elif action_type == 'discard':
-                self.global_understanding.discard(
-                    actor, action["name"], action["position"] - 1)
-            elif action_type == 'hint':
-                receiver, value = action
-                hands_at_time = r.HandHistory[-len(recent_actions) + i]
-                touching = get_touching(hands_at_time[receiver], value)
-                self.global_understanding.clue(receiver, value, touching)
-
-        best_move = find_best_move(
-            r.HandHistory[-1], r.whoseTurn, self.global_understanding)
-        # print('best_move', best_move, [card["name"] for card in r.HandHistory[-1][1]])
+        deadline = None if self.decisionTime is None \
+                   else time() + self.decisionTime
+        hands = [newest_to_oldest(hand.cards) for hand in r.h]
+        best_move = find_best_move(hands, r.whoseTurn, self.global_understanding,
+                                   deadline)
+        # print('best_move', best_move, [card["name"] for card in hands[1]])
         return best_move
 
+    def on_deal(self, r, event):
+        self.global_understanding = GlobalUnderstanding()
+
+    def on_hint(self, r, event):
+        touching = get_touching(
+            newest_to_oldest(r.h[event.receiver].cards), event.info)
+        self.global_understanding.clue(event.receiver, event.info, touching)
+
+    def on_play(self, r, event):
+        self.global_understanding.play(
+            event.player, event.card["name"], event.card["position"] - 1)
+
+    on_misplay = on_play
+
+    def on_discard(self, r, event):
+        self.global_understanding.discard(
+            event.player, event.card["name"], event.card["position"] - 1)
+
     def end_game_logging(self):
         """Can be overridden to perform logging at the end of the game"""
         pass
 
 
-def find_best_move(hands, player, global_understanding):
+def find_best_move(hands, player, global_understanding, deadline=None):
+    """The best move for player.  Past the deadline (a time() value), no
+    more clues are evaluated once there is a known play or one clue was, and
+    the discard is not simulated.  The known play is made then, else the clue
+    if it is safe (costs no score or strike and gets a card played or fixed)
+    or discarding is no option, else the discard.  The plays are few and
+    cheap, so they are always evaluated."""
     partner = (player + 1) % 2
     current_max_score = global_understanding.max_score() + (global_understanding.get_pace()
                                                             if global_understanding.get_pace() < 0 else 0)
-    simulation = deepcopy(global_understanding)
-    simulated_hand = deepcopy(hands[partner])
+    # Every move is simulated on this copy and rolled back afterwards.  The
+    # expected moves are not cached: each candidate leaves the copy in a
+    # different state, so hardly any of them repeat within a decision.
+    simulation = global_understanding.fork()
+    start = simulation.mark()
+    simulated_hand = list(hands[partner])
     simulation.make_expected_move(partner, simulated_hand)
     baseline_max_score = simulation.max_score_adjusted(
         player, player, simulated_hand)
     baseline_strikes = simulation.strikes
     bdrs = [identity for identity,
-            copies in simulation.usable_copies.items() if simulation.useful(identity) and copies < global_understanding.usable_copies[identity]]
+            copies in simulation.usable_copies.items() if copies < global_understanding.usable_copies[identity] and simulation.useful(identity)]
     assert len(bdrs) <= 1
     clue_count = simulation.clue_tokens
     baseline_bdr_eval = evaluate_bdr(
@@ -68,12 +94,12 @@ def find_best_move(hands, player, global_understanding):
         simulation.clue_tokens if simulation.clue_tokens < global_understanding.clue_tokens else 0
     baseline_tempo = simulation.score() + len(simulation.instructed_plays[partner]) + len(
         simulation.get_good_touch_plays_for_player(partner))
+    simulation.rollback(start)
 
     def evaluate_play(slot, good_touch_possibilities):
-        if len(good_touch_possibilities) == 1:
-            identity = next(iter(good_touch_possibilities))
-            simulation = deepcopy(global_understanding)
-            simulated_hand = deepcopy(hands[partner])
+        if is_single(good_touch_possibilities):
+            identity = get_identity(good_touch_possibilities)
+            simulated_hand = list(hands[partner])
             simulation.play(player, identity, slot)
 
             clues_before_move = simulation.clue_tokens
@@ -83,7 +109,7 @@ def find_best_move(hands, player, global_understanding):
             stalls = clues_before_move - \
                 simulation.clue_tokens if simulation.clue_tokens < clues_before_move else 0
             bdrs = [identity for identity,
-                    copies in simulation.usable_copies.items() if simulation.useful(identity) and copies < global_understanding.usable_copies[identity]]
+                    copies in simulation.usable_copies.items() if copies < global_understanding.usable_copies[identity] and simulation.useful(identity)]
             assert len(bdrs) <= 1
             clue_count = simulation.clue_tokens
             bdr_eval = evaluate_bdr(
@@ -91,7 +117,9 @@ def find_best_move(hands, player, global_understanding):
 
             # print('simulated play', score, -
             #       simulation.strikes, -stalls, evaluate_bdr(clue_count, bdrs[0], simulation.play_stacks, simulation.max_stacks), slot)
-            return score, -simulation.strikes, -stalls, bdr_eval, -slot
+            strikes = simulation.strikes
+            simulation.rollback(start)
+            return score, -strikes, -stalls, bdr_eval, -slot
         else:
             # print('unknown play', good_touch_possibilities)
             return baseline_max_score, -baseline_strikes, -baseline_stalls, baseline_bdr_eval, -slot
@@ -111,12 +139,12 @@ def find_best_move(hands, player, global_understanding):
 
     if best_play_slot == None and global_understanding.instructed_plays[player]:
         best_play_slot = global_understanding.instructed_plays[player][0]
-        asym_simulation = deepcopy(global_understanding)
         for slot, card in enumerate(hands[partner]):
-            if len(asym_simulation.hand_possibilities[partner][slot]) != 1:
-                asym_simulation.reveal_copy(card["name"])
-        possibilities = [identity for identity in asym_simulation.hand_possibilities[player]
-                         [best_play_slot] if is_playable(identity, global_understanding.play_stacks)]
+            if not is_single(simulation.hand_possibilities[partner][slot]):
+                simulation.reveal_copy(card["name"])
+        possibilities = simulation.hand_possibilities[player][best_play_slot] & \
+            global_understanding.playable_mask()
+        simulation.rollback(start)
         best_play_score, best_play_negated_strikes, best_play_negated_stalls, best_play_bdr_eval, _ = evaluate_play(
             best_play_slot, possibilities)
 
@@ -124,16 +152,17 @@ def find_best_move(hands, player, global_understanding):
     #       best_play_negated_strikes, best_play_bdr_eval, best_play_negated_stalls)
 
     def evaluate_clue(clue_value, touching):
-        simulation = deepcopy(global_understanding)
-        simulated_hand = deepcopy(hands[partner])
+        simulated_hand = list(hands[partner])
 
+        useful = simulation.useful_mask()
         previously_bad_touched = [slot for slot, touched in enumerate(simulation.touched[partner]) if touched and not simulation.useful(
-            hands[partner][slot]["name"]) and any([simulation.useful(identity) for identity in simulation.hand_possibilities[partner][slot]])]
+            hands[partner][slot]["name"]) and simulation.hand_possibilities[partner][slot] & useful]
 
         simulation.clue(partner, clue_value, touching)
 
+        useful = simulation.useful_mask()
         still_bad_touched = [slot for slot in previously_bad_touched if not simulation.useful(
-            hands[partner][slot]["name"]) and any([simulation.useful(identity) for identity in simulation.hand_possibilities[partner][slot]])]
+            hands[partner][slot]["name"]) and simulation.hand_possibilities[partner][slot] & useful]
 
         clue_tokens_before_playing = simulation.clue_tokens
         score_before_playing = simulation.score()
@@ -151,7 +180,7 @@ def find_best_move(hands, player, global_understanding):
             simulation.get_good_touch_plays_for_player(partner))
         fixes = len(previously_bad_touched) - len(still_bad_touched)
         bdrs = [identity for identity,
-                copies in simulation.usable_copies.items() if simulation.useful(identity) and copies < global_understanding.usable_copies[identity]]
+                copies in simulation.usable_copies.items() if copies < global_understanding.usable_copies[identity] and simulation.useful(identity)]
         assert len(bdrs) <= 1
         clue_count = simulation.clue_tokens
         bdr_eval = evaluate_bdr(
@@ -164,10 +193,17 @@ def find_best_move(hands, player, global_understanding):
             simulated_current_score = simulation.score()
             simulation.make_expected_move(partner, simulated_hand)
         strikes = simulation.strikes
+        simulation.rollback(start)
         # print('simulated clue', score, -simulation.strikes,
         #       tempo, fixes, -stalls, bdr_eval, clue_value, 'baseline_tempo', baseline_tempo)
         return score, -strikes, tempo, fixes, -stalls, bdr_eval, clue_value
 
+    def is_safe_clue(clue):
+        score, negated_strikes, tempo, fixes = clue[:4]
+        return score >= baseline_max_score and \
+            -negated_strikes <= baseline_strikes and \
+            (tempo > baseline_tempo or fixes > 0)
+
     best_clue = None
     best_clue_score = 0
     best_clue_negated_strikes = -3
@@ -175,16 +211,23 @@ def find_best_move(hands, player, global_understanding):
     best_clue_fixes = 0
     best_clue_bdr_eval = worst_bdr()
     best_clue_negated_stalls = -100
+    best_clue_safe = False
+    timed_out = False
     if global_understanding.clue_tokens >= 1:
-        clues = [evaluate_clue(clue_value, touching)
-                 for clue_value, touching in get_possible_clues(hands[partner])]
+        clues = []
+        for clue_value, touching in get_possible_clues(hands[partner]):
+            if (clues or best_play_slot != None) and is_past(deadline):
+                timed_out = True
+                break
+            clues.append(evaluate_clue(clue_value, touching))
         if clues:
             best_clue_score, best_clue_negated_strikes, best_clue_tempo, best_clue_fixes, best_clue_negated_stalls, best_clue_bdr_eval, best_clue = max(
                 clues)
+            best_clue_safe = is_safe_clue(max(clues))
     # print('best_clue', best_clue, best_clue_score, best_clue_negated_strikes,
     #       best_clue_tempo, best_clue_fixes, best_clue_bdr_eval, best_clue_negated_stalls)
 
-    if global_understanding.turns_left != None and global_understanding.strikes < 2 and best_play_slot == None and best_clue_tempo == baseline_tempo and global_understanding.play_stacks != global_understanding.max_stacks:
+    if not timed_out and global_understanding.turns_left != None and global_understanding.strikes < 2 and best_play_slot == None and best_clue_tempo == baseline_tempo and global_understanding.play_stacks != global_understanding.max_stacks:
         print('last turn yolo')
         return 'play', hands[player][0]
 
@@ -214,19 +257,26 @@ def find_best_move(hands, player, global_understanding):
                 else:
                     best_discard = 0
 
-        simulation = deepcopy(global_understanding)
-        simulated_hand = deepcopy(hands[partner])
-        trash_identities = [
-            identity
-            for identity in simulation.hand_possibilities[player][best_discard]
-            if not simulation.useful(identity)]
+    if timed_out:
+        # The discard is not simulated: the known play is made, else the clue
+        # evaluated if it is safe or the discard is not an option, else the
+        # discard.
+        if best_play_slot != None:
+            return 'play', hands[player][best_play_slot]
+        if best_clue_safe or best_discard == None or avoid_discarding:
+            return 'hint', (partner, best_clue)
+        return 'discard', hands[player][best_discard]
+
+    if best_discard != None:
+        simulated_hand = list(hands[partner])
+        trash_identities = get_identities(
+            simulation.hand_possibilities[player][best_discard] & ~simulation.useful_mask())
         discard_identity = min(trash_identities) if trash_identities else min(
-            simulation.hand_possibilities[player][best_discard])
+            get_identities(simulation.hand_possibilities[player][best_discard]))
         simulation.discard(player, discard_identity, best_discard)
 
         clue_tokens_before_move = simulation.clue_tokens
-        usable_copies_before_move = deepcopy(
-            simulation.usable_copies)
+        usable_copies_before_move = dict(simulation.usable_copies)
 
         simulation.make_expected_move(partner, simulated_hand)
         discard_score = 0 if avoid_discarding else simulation.max_score_adjusted(
@@ -235,11 +285,12 @@ def find_best_move(hands, player, global_understanding):
         discard_stalls = clue_tokens_before_move - \
             simulation.clue_tokens if simulation.clue_tokens < clue_tokens_before_move else 0
         bdrs = [identity for identity,
-                copies in simulation.usable_copies.items() if simulation.useful(identity) and copies < usable_copies_before_move[identity]]
+                copies in simulation.usable_copies.items() if copies < usable_copies_before_move[identity] and simulation.useful(identity)]
         assert len(bdrs) <= 1
         clue_count = simulation.clue_tokens
         discard_bdr_eval = evaluate_bdr(
             clue_count, bdrs[0], simulation.play_stacks, simulation.max_stacks) if bdrs else no_bdr(clue_count)
+        simulation.rollback(start)
     # print('best_discard', best_discard, discard_score,
     #       discard_strikes, discard_stalls, -baseline_bdrs)
 
@@ -273,6 +324,10 @@ def find_best_move(hands, player, global_understanding):
         return 'hint', (partner, best_clue)
 
 
+def is_past(deadline):
+    return deadline is not None and time() > deadline
+
+
 def evaluate_bdr(clue_count, identity, play_stacks, max_stacks):
     suit, rank = parse_identity(identity)
     distance = rank - play_stacks[suit] - 1
@@ -302,8 +357,9 @@ def get_possible_clues(hand):
     return clues
 
 
-class GlobalUnderstanding:
+class GlobalUnderstanding(object):
     def __init__(self, suits=VANILLA_SUITS, n_players=2, hand_size=5):
+        self.undo_log = None # (container, key, old value) while recording
         self.clue_tokens = 8
         self.play_stacks = dict([(suit, 0) for suit in suits])
         self.strikes = 0
@@ -311,8 +367,8 @@ class GlobalUnderstanding:
         self.deck_size = len(suits) * len(SUIT_CONTENTS)
         self.initial_copies = dict(
             [(str(rank) + suit, SUIT_CONTENTS.count(str(rank))) for rank in range(1, 6) for suit in suits])
-        self.unseen_copies = deepcopy(self.initial_copies)
-        self.usable_copies = deepcopy(self.initial_copies)
+        self.unseen_copies = dict(self.initial_copies)
+        self.usable_copies = dict(self.initial_copies)
         self.hand_possibilities = []
         self.touched = []
         for player in range(n_players):
@@ -326,35 +382,80 @@ class GlobalUnderstanding:
         self.instructed_to_lock = [False for player in range(n_players)]
         self.turns_left = None
 
+    def fork(self):
+        """Cheap copy to simulate moves on."""
+        fork = copy(self)
+        fork.play_stacks = dict(self.play_stacks)
+        if self.max_stacks is self.play_stacks: # Struck out
+            fork.max_stacks = fork.play_stacks
+        else:
+            fork.max_stacks = dict(self.max_stacks)
+        fork.unseen_copies = dict(self.unseen_copies)
+        fork.usable_copies = dict(self.usable_copies)
+        fork.hand_possibilities = [list(hand)
+                                   for hand in self.hand_possibilities]
+        fork.touched = [list(hand) for hand in self.touched]
+        fork.instructed_plays = [list(slots) for slots in self.instructed_plays]
+        fork.instructed_trash = [list(slots) for slots in self.instructed_trash]
+        fork.instructed_chop = list(self.instructed_chop)
+        fork.instructed_to_lock = list(self.instructed_to_lock)
+        fork.undo_log = None
+        return fork
+
+    def mark(self):
+        """Start recording changes, and return a mark that rollback can
+        restore the current state from."""
+        if self.undo_log is None:
+            self.undo_log = []
+        return (len(self.undo_log), self.clue_tokens, self.strikes,
+                self.deck_size, self.turns_left, self.max_stacks)
+
+    def rollback(self, mark):
+        """Undo every change made since mark was taken."""
+        length, self.clue_tokens, self.strikes, self.deck_size, \
+            self.turns_left, self.max_stacks = mark
+        undo_log = self.undo_log
+        while len(undo_log) > length:
+            container, key, value = undo_log.pop()
+            container[key] = value
+
+    def assign(self, container, key, value):
+        """container[key] = value, recorded for rollback.  The state kept in
+        dicts and lists is only changed through here; the other attributes
+        are restored from the mark."""
+        if self.undo_log is not None:
+            self.undo_log.append((container, key, container[key]))
+        container[key] = value
+
     def draw(self, player, replacing=None):
         if replacing is not None:
-            for i, slot in reversed(list(enumerate(self.instructed_plays[player]))):
-                if slot < replacing:
-                    self.instructed_plays[player][i] += 1
-                elif slot == replacing:
-                    self.instructed_plays[player].pop(i)
-            for i, slot in reversed(list(enumerate(self.instructed_trash[player]))):
-                if slot < replacing:
-                    self.instructed_trash[player][i] += 1
-                elif slot == replacing:
-                    self.instructed_trash[player].pop(i)
-            self.instructed_chop[player] = None
-            self.instructed_to_lock[player] = False
-
-            self.hand_possibilities[player].pop(replacing)
-            self.touched[player].pop(replacing)
+            self.assign(self.instructed_plays, player, [
+                slot + 1 if slot < replacing else slot
+                for slot in self.instructed_plays[player] if slot != replacing])
+            self.assign(self.instructed_trash, player, [
+                slot + 1 if slot < replacing else slot
+                for slot in self.instructed_trash[player] if slot != replacing])
+            self.assign(self.instructed_chop, player, None)
+            self.assign(self.instructed_to_lock, player, False)
+
+            hand = self.hand_possibilities[player]
+            self.assign(self.hand_possibilities, player,
+                        hand[:replacing] + hand[replacing + 1:])
+            touched = self.touched[player]
+            self.assign(self.touched, player,
+                        touched[:replacing] + touched[replacing + 1:])
         if self.deck_size == 0:
-            for i in range(len(self.instructed_plays[player])):
-                self.instructed_plays[player][i] -= 1
-            for i in range(len(self.instructed_trash[player])):
-                self.instructed_trash[player][i] -= 1
+            self.assign(self.instructed_plays, player, [
+                slot - 1 for slot in self.instructed_plays[player]])
+            self.assign(self.instructed_trash, player, [
+                slot - 1 for slot in self.instructed_trash[player]])
         else:
             self.deck_size -= 1
-            new_card_possibilities = set(
-                [identity for identity, copies in self.unseen_copies.items() if copies > 0])
-            self.hand_possibilities[player] = [
-                new_card_possibilities] + self.hand_possibilities[player]
-            self.touched[player] = [False] + self.touched[player]
+            new_card_possibilities = sum(
+                [1 << CARD_IDS[identity] for identity, copies in self.unseen_copies.items() if copies > 0])
+            self.assign(self.hand_possibilities, player, [
+                new_card_possibilities] + self.hand_possibilities[player])
+            self.assign(self.touched, player, [False] + self.touched[player])
             if self.deck_size == 0:
                 self.turns_left = len(self.hand_possibilities)
 
@@ -362,27 +463,28 @@ class GlobalUnderstanding:
         if self.unseen_copies[identity] == 0:
             # print('self.unseen_copies[identity] == 0', self, identity)
             return
-        self.unseen_copies[identity] -= 1
+        self.assign(self.unseen_copies, identity,
+                    self.unseen_copies[identity] - 1)
         if self.unseen_copies[identity] == 0:
             self.last_copy_revealed(identity)
 
     def last_copy_revealed(self, identity):
+        bit = 1 << CARD_IDS[identity]
         for player, hand in enumerate(self.hand_possibilities):
             for slot, card in enumerate(hand):
-                if len(card) == 1:
-                    continue
-                try:
-                    self.hand_possibilities[player][slot].remove(identity)
-                except ValueError:
+                if is_single(card) or not card & bit:
                     continue
-                if len(card) == 1:
-                    self.reveal_copy(next(iter(card)))
+                card &= ~bit
+                self.assign(hand, slot, card)
+                if is_single(card):
+                    self.reveal_copy(get_identity(card))
 
     def discard_copy(self, identity):
         if self.usable_copies[identity] == 0:
             # print('self.usable_copies[identity] == 0', self, identity)
             return
-        self.usable_copies[identity] -= 1
+        self.assign(self.usable_copies, identity,
+                    self.usable_copies[identity] - 1)
         if self.usable_copies[identity] == 0:
             self.last_copy_discarded(identity)
 
@@ -390,14 +492,15 @@ class GlobalUnderstanding:
         if not self.useful(identity):
             return
         suit, rank = parse_identity(identity)
-        self.max_stacks[suit] = min(rank - 1, self.max_stacks[suit])
+        self.assign(self.max_stacks, suit,
+                    min(rank - 1, self.max_stacks[suit]))
 
     def play(self, player, identity, slot):
         # print('play', player, identity, slot)
         suit, rank = parse_identity(identity)
 
         if self.play_stacks[suit] == rank - 1:
-            self.play_stacks[suit] = rank
+            self.assign(self.play_stacks, suit, rank)
             if rank == 5 and self.clue_tokens != 8:
                 self.clue_tokens += 1
         else:
@@ -416,14 +519,14 @@ class GlobalUnderstanding:
         self.interpret_play(player, identity, slot)
 
         self.draw(player, replacing=slot)
-        if len(possibilities) > 1:
+        if possibilities & (possibilities - 1):
             self.reveal_copy(identity)
         if misplayed:
             self.discard_copy(identity)
 
     def interpret_play(self, player, identity, slot):
-        self.instructed_chop[player] = None
-        self.instructed_to_lock[player] = False
+        self.assign(self.instructed_chop, player, None)
+        self.assign(self.instructed_to_lock, player, False)
 
     def discard(self, player, identity, slot):
         # print('discard', player, identity, slot)
@@ -439,13 +542,12 @@ class GlobalUnderstanding:
         self.clue_tokens += 1
 
     def interpret_discard(self, player, identity, slot):
-        self.instructed_chop[player] = None
-        self.instructed_to_lock[player] = False
+        self.assign(self.instructed_chop, player, None)
+        self.assign(self.instructed_to_lock, player, False)
 
     def clue(self, receiver, value, touching):
-        old_receiver_possibilities = deepcopy(
-            self.hand_possibilities[receiver])
-        old_receiver_touched = deepcopy(self.touched[receiver])
+        old_receiver_possibilities = list(self.hand_possibilities[receiver])
+        old_receiver_touched = list(self.touched[receiver])
 
         self.apply_information(receiver, value, touching)
 
@@ -461,19 +563,19 @@ class GlobalUnderstanding:
     def apply_information(self, receiver, value, touching):
         hand_possibilities = self.hand_possibilities[receiver]
         for slot, card_possibilities in enumerate(hand_possibilities):
-            if len(card_possibilities) == 1:
+            if is_single(card_possibilities):
                 continue
 
             if slot in touching:
-                self.hand_possibilities[receiver][slot] = filter_touched(
-                    card_possibilities, value)
-                self.touched[receiver][slot] = True
+                self.assign(hand_possibilities, slot, filter_touched(
+                    card_possibilities, value))
+                self.assign(self.touched[receiver], slot, True)
             else:
-                self.hand_possibilities[receiver][slot] = filter_untouched(
-                    card_possibilities, value)
+                self.assign(hand_possibilities, slot, filter_untouched(
+                    card_possibilities, value))
 
-            if len(card_possibilities) == 1:
-                self.reveal_copy(next(iter(card_possibilities)))
+            if is_single(card_possibilities):
+                self.reveal_copy(get_identity(card_possibilities))
 
     def interpret_clue(self, receiver, old_receiver_possibilities, old_receiver_touched, value, touching):
         old_receiver_identified_plays = self.get_good_touch_plays(
@@ -523,25 +625,27 @@ class GlobalUnderstanding:
         if value in SUIT_CONTENTS and not all_trash:
             if receiver_was_loaded:
                 if old_receiver_unclued[0] in touching:
-                    self.instructed_trash[receiver].append(referent)
+                    self.assign(self.instructed_trash, receiver,
+                                self.instructed_trash[receiver] + [referent])
                 else:
-                    self.instructed_plays[receiver].append(referent)
+                    self.assign(self.instructed_plays, receiver,
+                                self.instructed_plays[receiver] + [referent])
             elif not self.instructed_to_lock[receiver] and referent is old_receiver_unclued[0]:
-                self.instructed_chop[receiver] = None
-                self.instructed_to_lock[receiver] = True
+                self.assign(self.instructed_chop, receiver, None)
+                self.assign(self.instructed_to_lock, receiver, True)
             else:
-                self.instructed_chop[receiver] = referent
-                self.instructed_to_lock[receiver] = False
+                self.assign(self.instructed_chop, receiver, referent)
+                self.assign(self.instructed_to_lock, receiver, False)
         else:
-            self.instructed_plays[receiver].append(referent)
+            self.assign(self.instructed_plays, receiver,
+                        self.instructed_plays[receiver] + [referent])
 
     def make_expected_move(self, player, hand):
-        if self.turns_left == 0:
-            return
-        unseen_trashes = [
-            identity for identity in self.unseen_copies.keys() if not self.useful(identity)]
-        placeholder_card = {
-            "name": unseen_trashes[0] if unseen_trashes else '1r'}
+        if self.turns_left == 0 or self.max_stacks is self.play_stacks:
+            return # The game is over (struck out: see play).
+        unseen_trash = next((identity for identity in self.unseen_copies.keys()
+                             if not self.useful(identity)), '1r')
+        placeholder_card = {"name": unseen_trash}
 
         play_slot = None
 
@@ -608,40 +712,56 @@ class GlobalUnderstanding:
         self.discard(player, identity, 0)
 
     def get_good_touch_plays(self, hand_possibilities, touched):
-        return [
-            (slot,
-             [identity for identity in card_possibilities if not touched[slot]
-              or self.useful(identity)]
-             )
-            for slot, card_possibilities in enumerate(hand_possibilities)
-            if any([
-                not touched[slot] or self.useful(identity)
-                for identity in card_possibilities])
-            and all([
-                is_playable(identity, self.play_stacks)
-                for identity in card_possibilities
-                if not touched[slot] or self.useful(identity)])]
+        useful = self.useful_mask()
+        playable = self.playable_mask()
+        plays = []
+        for slot, card_possibilities in enumerate(hand_possibilities):
+            # Touched cards are assumed not to be trash (good touch).
+            if touched[slot]:
+                card_possibilities &= useful
+            if card_possibilities and not card_possibilities & ~playable:
+                plays.append((slot, card_possibilities))
+        return plays
 
     def get_good_touch_plays_for_player(self, player):
         return self.get_good_touch_plays(self.hand_possibilities[player], self.touched[player])
 
     def get_known_trashes(self, hand_possibilities):
-        return [slot for slot, card_possibilities in enumerate(hand_possibilities) if self.is_known_trash(hand_possibilities, slot)]
+        useful = self.useful_mask()
+        return [slot for slot in range(len(hand_possibilities)) if self.is_known_trash(hand_possibilities, slot, useful)]
 
-    def is_known_trash(self, hand_possibilities, slot):
-        def duplicated(identity):
-            for slot2, card_possibilities in enumerate(hand_possibilities):
-                if slot2 == slot:
-                    continue
-                if len(card_possibilities) == 1 and next(iter(card_possibilities)) == identity:
-                    return True
-            return False
-        return all([not self.useful(identity) or duplicated(identity) for identity in hand_possibilities[slot]])
+    def is_known_trash(self, hand_possibilities, slot, useful):
+        duplicated = 0
+        for slot2, card_possibilities in enumerate(hand_possibilities):
+            if slot2 != slot and is_single(card_possibilities):
+                duplicated |= card_possibilities
+        return not hand_possibilities[slot] & useful & ~duplicated
 
     def useful(self, identity):
         suit, rank = parse_identity(identity)
         return self.play_stacks[suit] < rank and rank <= self.max_stacks[suit]
 
+    def useful_mask(self):
+        mask = 0
+        for suit, played in self.play_stacks.items():
+            mask |= ((1 << self.max_stacks[suit]) -
+                     (1 << played)) << SUIT_SHIFTS[suit]
+        return mask
+
+    def playable_mask(self):
+        mask = 0
+        for suit, played in self.play_stacks.items():
+            mask |= (1 << played & RANK_BITS) << SUIT_SHIFTS[suit]
+        return mask
+
+    def final_round_mask(self):
+        mask = 0
+        for suit, played in self.play_stacks.items():
+            max_stack = self.max_stacks[suit]
+            mask |= ((1 << max_stack) -
+                     (1 << max(played, max_stack - 2))) << SUIT_SHIFTS[suit]
+        return mask
+
     def score(self):
         return sum(self.play_stacks.values())
 
@@ -657,15 +777,16 @@ class GlobalUnderstanding:
         return self.max_score()
 
     def holds_final_round_card(self, player):
-        return any([
-            any([
-                self.useful(identity)
-                for identity in card_possibilities])
-            and all([
-                    self.is_final_round_card(identity)
-                    for identity in card_possibilities
-                    if not self.touched[player][slot] or self.useful(identity)])
-            for slot, card_possibilities in enumerate(self.hand_possibilities[player])])
+        useful = self.useful_mask()
+        final_round = self.final_round_mask()
+        for slot, card_possibilities in enumerate(self.hand_possibilities[player]):
+            if not card_possibilities & useful:
+                continue
+            if self.touched[player][slot]:
+                card_possibilities &= useful
+            if not card_possibilities & ~final_round:
+                return True
+        return False
 
     def is_final_round_card(self, identity):
         suit, rank = parse_identity(identity)
@@ -712,28 +833,19 @@ def get_unclued(hand_possibilities):
 
 
 def is_clued(card_possibilities):
-    if len(card_possibilities) > 5:
+    count = count_identities(card_possibilities)
+    if count > 5:
         return False
-    possible_ranks_per_suit = {}
-    possible_suits_per_rank = {}
-    for possibility in card_possibilities:
-        rank = possibility[0]
-        suit = possibility[1]
-        try:
-            possible_ranks_per_suit[suit].add(rank)
-        except KeyError:
-            possible_ranks_per_suit[suit] = set([rank])
-        try:
-            possible_suits_per_rank[rank].add(suit)
-        except KeyError:
-            possible_suits_per_rank[rank] = set([suit])
-    return \
-        all([
-            len(ranks) == 1
-            for ranks in possible_ranks_per_suit.values()])\
-        or all([
-            len(suits) == 1
-            for suits in possible_suits_per_rank.values()])
+    # Clued if no two possibilities share a suit, or no two share a rank.
+    suits = card_possibilities
+    for shift in range(1, len(RANKS)):
+        suits |= card_possibilities >> shift
+    ranks = 0
+    while card_possibilities:
+        ranks |= card_possibilities & RANK_BITS
+        card_possibilities >>= len(RANKS)
+    return count_identities(suits & SUIT_BITS) == count or \
+        count_identities(ranks) == count
 
 
 def get_touching(hand, clue_value):
@@ -741,11 +853,28 @@ def get_touching(hand, clue_value):
 
 
 def filter_touched(card_possibilities, clue_value):
-    return [identity for identity in card_possibilities if clue_value in identity]
+    return card_possibilities & CLUE_MASKS[clue_value]
 
 
 def filter_untouched(card_possibilities, clue_value):
-    return [identity for identity in card_possibilities if clue_value not in identity]
+    return card_possibilities & ~CLUE_MASKS[clue_value]
+
+
+def is_single(card_possibilities):
+    return card_possibilities != 0 and not card_possibilities & (card_possibilities - 1)
+
+
+def count_identities(card_possibilities):
+    return bin(card_possibilities).count('1')
+
+
+def get_identity(card_possibilities):
+    """The identity of a card with a single possibility."""
+    return CARD_NAMES[card_possibilities.bit_length() - 1]
+
+
+def get_identities(card_possibilities):
+    return [identity for i, identity in enumerate(CARD_NAMES) if card_possibilities >> i & 1]
 
 
 def newest_to_oldest(cards):
@@ -11,6 +11,12 @@ run new games with the recorded seed value and compare
 ./test/regression.py --cleanup
 delete recorded seed value and games
 
+./test/regression.py --cases
+run the seeded games checked in below and compare with their expected output
+
+python -m unittest discover test
+run the unit tests in test/
+
 """
 
 import argparse, random, subprocess, sys
@@ -28,8 +34,117 @@ parser.add_argument('-r', '--record', help="record current output",
     action="store_true")
 parser.add_argument('-c', '--cleanup', help="remove recorded data",
     action="store_true")
+parser.add_argument('--cases', help="run the checked in cases",
+    action="store_true")
 args = parser.parse_args()
 
+# Runs whose output must not depend on the number of worker processes: each
+# is played with -j 1 and with -j 2, and the outputs compared.
+jobsCases = ['newest basic heuristic -t vanilla -n 6 -s 5',
+             'newest newest newest newest -n 5 -s 8 -v scores']
+
+# Seeded runs with the output they must give.  Each is (arguments, Python
+# version, expected), where expected is the list of the scores of the rounds
+# or text the output must contain.  Random numbers differ between Python 2
+# and 3, so cases with scores are for one of them (None: either); run the
+# cases with both.
+cases = [
+    # The police catch AIs which look at their own cards, and only them
+    ('cheater cheater -s 1 -p', None, 'You have been caught by the police!'),
+    ('idiot idiot idiot -s 1 -p', None, 'You have been caught by the police!'),
+    ('newest newest newest -t vanilla -n 4 -s 3 -p -v scores', 3,
+     [23, 22, 17, 19]),
+    ('newest newest newest -t vanilla -n 4 -s 3 -p -v scores', 2,
+     [23, 21, 23, 19]),
+    ('basic brainbow heuristic -t vanilla -n 4 -s 3 -p -v scores', 3,
+     [16, 13, 8, 10]),
+    ('basic brainbow heuristic -t vanilla -n 4 -s 3 -p -v scores', 2,
+     [11, 11, 9, 10]),
+    # Cards the engine deduces from public knowledge are marked known and
+    # ruled out of the other cards' possibilities
+    ('brainbow brainbow brainbow brainbow -t vanilla -n 8 -s 4 -v scores', 3,
+     [8, 5, 9, 7, 8, 4, 10, 8]),
+    ('brainbow brainbow brainbow brainbow -t vanilla -n 8 -s 4 -v scores', 2,
+     [8, 7, 9, 8, 8, 7, 7, 7]),
+    ('newest newest newest -n 8 -s 4 -v scores', 3,
+     [21, 25, 25, 24, 20, 20, 22, 19]),
+    ('newest newest newest -n 8 -s 4 -v scores', 2,
+     [22, 24, 27, 25, 21, 21, 25, 24]),
+    # Encoder reads past hands through r.hands_at
+    ('encoder encoder encoder encoder encoder -t vanilla -n 4 -s 3 -v scores',
+     3, [25, 20, 24, 22]),
+    ('encoder encoder encoder encoder encoder -t vanilla -n 4 -s 3 -v scores',
+     2, [25, 25, 19, 21]),
+    # ref_sieve simulates its moves on forks of its GlobalUnderstanding
+    ('ref_sieve ref_sieve -t vanilla -n 6 -s 2 -v scores', 3,
+     [21, 25, 23, 23, 25, 24]),
+    ('ref_sieve ref_sieve -t vanilla -n 6 -s 2 -v scores', 2,
+     [25, 22, 25, 23, 24, 22]),
+    # ref_sieve rolls its simulated moves back with an undo log
+    ('ref_sieve ref_sieve -t vanilla -n 10 -s 7 -v scores', 3,
+     [25, 24, 24, 25, 24, 22, 25, 25, 24, 25]),
+    ('ref_sieve ref_sieve -t vanilla -n 10 -s 7 -v scores', 2,
+     [23, 21, 25, 25, 23, 25, 21, 25, 25, 25]),
+    # ref_sieve keeps the possible identities of the cards as bitmasks
+    ('ref_sieve ref_sieve -t vanilla -n 8 -s 11 -v scores', 3,
+     [23, 22, 23, 25, 22, 25, 24, 22]),
+    ('ref_sieve ref_sieve -t vanilla -n 8 -s 11 -v scores', 2,
+     [24, 19, 24, 22, 22, 25, 20, 25]),
+    # ref_sieve stops simulating expected moves once it has struck out
+    ('ref_sieve ref_sieve -t vanilla -n 5 -s 42 -v scores', 3,
+     [24, 23, 24, 21, 24]),
+    ('ref_sieve ref_sieve -t vanilla -n 5 -s 42 -v scores', 2,
+     [23, 25, 25, 24, 25]),
+    # gencoder scores its candidate codes in batches
+    ('gencoder gencoder gencoder gencoder -t vanilla -n 3 -s 11 -v scores', 2,
+     [25, 22, 25]),
+    # gencoder propagates the card counts through the information matrix
+    # until nothing changes
+    ('gencoder gencoder gencoder -t vanilla -n 3 -s 12 -v scores', 2,
+     [20, 21, 21]),
+    ('gencoder gencoder gencoder gencoder gencoder -t vanilla -n 2 -s 13 '
+     '-v scores', 2, [25, 25]),
+    # encoder keeps its information matrix as bitmasks
+    ('encoder encoder encoder encoder encoder -t vanilla -n 4 -s 20 -v scores',
+     3, [23, 24, 25, 25]),
+    ('encoder encoder encoder encoder encoder -t vanilla -n 4 -s 20 -v scores',
+     2, [24, 24, 24, 24]),
+]
+
+def run_wrapper(arguments):
+    """Output of the wrapper run with this interpreter."""
+    proc = subprocess.Popen(
+        [sys.executable, 'hanabi_wrapper.py'] + arguments.split(),
+        universal_newlines=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT)
+    return proc.communicate()[0]
+
+if args.cases:
+    failures = 0
+    for arguments, version, expected in cases:
+        if version not in (None, sys.version_info[0]):
+            continue
+        output = run_wrapper(arguments)
+        if isinstance(expected, list):
+            scores = [int(line.split()[1]) for line in output.splitlines()
+                      if line.startswith('Score: ')]
+            passed = scores == expected
+        else:
+            passed = expected in output
+        if passed:
+            print('output of ' + arguments + ' is as expected')
+        else:
+            print('output of ' + arguments + ' has changed')
+            failures += 1
+    for arguments in jobsCases:
+        if run_wrapper(arguments + ' -j 1') == run_wrapper(arguments + ' -j 2'):
+            print('output of ' + arguments + ' is the same with -j 2')
+        else:
+            print('output of ' + arguments + ' changes with -j 2')
+            failures += 1
+    exit(1 if failures else 0)
+
 if args.cleanup:
     print('removing stored test data')
     subprocess.call('rm -r test/tmp/', shell=True)
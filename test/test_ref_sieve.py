@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+
+""" Tests of the referential sieve AI's simulations
+
+python -m unittest discover test
+or
+python -m pytest test
+
+"""
+
+import os, random, sys, unittest
+from copy import deepcopy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hanabi_classes import VANILLA_SUITS, SUIT_CONTENTS
+from play_hanabi import play_one_round
+from players.ref_sieve_player import ReferentialSievePlayer, \
+    GlobalUnderstanding, get_touching
+
+
+def deal(rng):
+    """A shuffled vanilla deck and two hands of 5 cards, newest first."""
+    deck = [{"name": number + suit}
+            for suit in VANILLA_SUITS for number in SUIT_CONTENTS]
+    rng.shuffle(deck)
+    hands = [[deck.pop() for card in range(5)] for player in range(2)]
+    return hands, deck
+
+
+def understanding(gu):
+    """A copy of all of gu's state, to compare."""
+    state = dict(vars(gu))
+    del state['undo_log']
+    state = deepcopy(state)
+    state['struck_out'] = gu.max_stacks is gu.play_stacks
+    return state
+
+
+def deep_copy(gu):
+    """deepcopy(gu), with its flat dicts copied like fork does.  In Python 2
+    a deepcopy of a dict may iterate in another order, and make_expected_move
+    picks its placeholder card in the order of unseen_copies."""
+    copied = deepcopy(gu)
+    for name in ('play_stacks', 'unseen_copies', 'usable_copies'):
+        setattr(copied, name, dict(getattr(gu, name)))
+    copied.max_stacks = copied.play_stacks if gu.max_stacks is gu.play_stacks \
+                        else dict(gu.max_stacks)
+    return copied
+
+
+def is_over(gu):
+    return gu.strikes >= 3 or gu.turns_left == 0
+
+
+def make_random_move(gu, hands, deck, player, rng):
+    """Make a random legal move for player on gu, updating the real hands
+    and deck to match, as the AI does when it simulates moves."""
+    partner = (player + 1) % 2
+    moves = ['play', 'expected']
+    if gu.clue_tokens > 0:
+        moves.append('clue')
+    if gu.clue_tokens < 8:
+        moves.append('discard')
+    move = rng.choice(moves)
+    if move == 'clue':
+        values = [value for value in VANILLA_SUITS + '12345'
+                  if get_touching(hands[partner], value)]
+        value = rng.choice(values)
+        gu.clue(partner, value, get_touching(hands[partner], value))
+    elif move == 'expected':
+        gu.make_expected_move(player, hands[player])
+    else:
+        slot = rng.randrange(len(hands[player]))
+        identity = hands[player].pop(slot)["name"]
+        if deck:
+            hands[player].insert(0, deck.pop())
+        getattr(gu, move)(player, identity, slot)
+
+
+def make_random_moves(gu, hands, deck, player, nMoves, seed):
+    """Make up to nMoves random moves from player on; return whose turn it
+    is after them."""
+    rng = random.Random(seed)
+    for move in range(nMoves):
+        if is_over(gu):
+            break
+        make_random_move(gu, hands, deck, player, rng)
+        player = (player + 1) % 2
+    return player
+
+
+class RollbackTest(unittest.TestCase):
+
+    def test_rollback_matches_deepcopy(self):
+        nChecked = 0
+        for seed in range(40):
+            rng = random.Random(seed)
+            hands, deck = deal(rng)
+            gu = GlobalUnderstanding()
+            player = 0
+            while not is_over(gu):
+                before = understanding(gu)
+                nMoves = rng.randint(1, 6)
+                moveSeed = rng.random()
+
+                copied = deep_copy(gu)
+                copiedHands = deepcopy(hands)
+                make_random_moves(copied, copiedHands, list(deck), player,
+                                  nMoves, moveSeed)
+
+                simulation = gu.fork()
+                start = simulation.mark()
+                simulatedHands = [list(hand) for hand in hands]
+                simulatedDeck = list(deck)
+                nextPlayer = make_random_moves(
+                    simulation, simulatedHands, simulatedDeck, player,
+                    nMoves, moveSeed)
+                self.assertEqual(understanding(simulation),
+                                 understanding(copied))
+                self.assertEqual(simulatedHands, copiedHands)
+                self.assertEqual(understanding(gu), before)
+
+                # A nested mark only undoes what came after it.
+                middle = understanding(simulation)
+                inner = simulation.mark()
+                make_random_moves(simulation, simulatedHands, simulatedDeck,
+                                  nextPlayer, 3, moveSeed)
+                simulation.rollback(inner)
+                self.assertEqual(understanding(simulation), middle)
+
+                simulation.rollback(start)
+                self.assertEqual(understanding(simulation), before)
+                self.assertEqual(understanding(gu), before)
+                nChecked += 1
+
+                make_random_moves(gu, hands, deck, player, 1, moveSeed)
+                player = (player + 1) % 2
+        self.assertGreater(nChecked, 300)
+
+
+class DeadlineTest(unittest.TestCase):
+
+    def setUp(self):
+        # Every clue evaluated is simulated with one call of clue().
+        self.nClues = 0
+        clue = vars(GlobalUnderstanding)['clue']
+        def counted_clue(gu, *args):
+            self.nClues += 1
+            return clue(gu, *args)
+        GlobalUnderstanding.clue = counted_clue
+        self.addCleanup(setattr, GlobalUnderstanding, 'clue', clue)
+
+    def play_games(self, decisionTime):
+        """Scores of 10 seeded games with this decisionTime, and the number
+        of clues evaluated in every decision."""
+        test = self
+        evaluated = []
+        class CountingPlayer(ReferentialSievePlayer):
+            def play(self, r):
+                before = test.nClues
+                move = super(CountingPlayer, self).play(r)
+                evaluated.append(test.nClues - before)
+                return move
+        CountingPlayer.decisionTime = decisionTime
+        scores = []
+        for seed in range(10):
+            random.seed(seed)
+            players = [CountingPlayer(i, None, 'silent') for i in range(2)]
+            scores.append(play_one_round('vanilla', players, ['a', 'b'],
+                                         'silent', 'full', False, None, {}))
+        return scores, evaluated
+
+    def test_no_time_evaluates_at_most_one_clue(self):
+        scores, evaluated = self.play_games(0)
+        self.assertEqual(max(evaluated), 1)
+
+    def test_enough_time_changes_nothing(self):
+        scores, evaluated = self.play_games(None)
+        self.assertGreater(max(evaluated), 1)
+        self.assertEqual(self.play_games(60), (scores, evaluated))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+
+""" Tests of the Round bookkeeping that AIs rely on
+
+python -m unittest discover test
+or
+python -m pytest test
+
+"""
+
+import os, random, sys, unittest
+from copy import deepcopy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hanabi_classes import Round, HAND_HISTORY_WINDOW
+from players.newest_card_player import NewestCardPlayer
+
+
+class HistoryCheckingPlayer(NewestCardPlayer):
+    """Plays like newest, and on each turn checks r.hands_at against deep
+    copies of the hands taken at the start of every turn so far."""
+
+    def __init__(self, *args):
+        super(HistoryCheckingPlayer, self).__init__(*args)
+        self.fullHistory = None # Shared by the players of a round
+        self.nChecked = 0
+        self.failures = []
+
+    def play(self, r):
+        self.fullHistory.append(deepcopy(r.h))
+        for turn in range(r.turnNumber + 1):
+            if turn > r.turnNumber - self.handHistoryWindow:
+                hands = r.hands_at(turn)
+                expected = self.fullHistory[turn]
+                if [hand.cards for hand in hands] != \
+                   [hand.cards for hand in expected]:
+                    self.failures.append('hands of turn {} differ at turn {}'
+                                         .format(turn, r.turnNumber))
+                self.nChecked += 1
+                continue
+            try:
+                r.hands_at(turn)
+            except IndexError:
+                continue
+            self.failures.append('hands of turn {} kept at turn {}'
+                                 .format(turn, r.turnNumber))
+        return super(HistoryCheckingPlayer, self).play(r)
+
+
+class PolicedHistoryPlayer(NewestCardPlayer):
+    """Plays like newest under the police, and on each turn checks that the
+    hands of earlier turns hide exactly the cards hidden in its own hand."""
+
+    def __init__(self, *args):
+        super(PolicedHistoryPlayer, self).__init__(*args)
+        self.nChecked = 0
+        self.failures = []
+
+    def play(self, r):
+        hidden = [card.cardNo for card in r.h[self.me].cards
+                  if 'name' not in card]
+        first = max(0, r.turnNumber - self.handHistoryWindow + 1)
+        for turn in range(first, r.turnNumber):
+            hands = r.hands_at(turn)
+            if hands[0] is r.hands_at(turn)[0]:
+                self.failures.append('hands of turn {} shared at turn {}'
+                                     .format(turn, r.turnNumber))
+            for hand in hands:
+                for card in hand.cards:
+                    if card.cardNo in hidden:
+                        correct = 'name' not in card and 'id' not in card
+                    else:
+                        correct = card.get('name') == \
+                                  r.startingDeck[card.cardNo]
+                    if not correct:
+                        self.failures.append(
+                            'card {} of turn {} read at turn {}'
+                            .format(card.cardNo, turn, r.turnNumber))
+                    self.nChecked += 1
+        return super(PolicedHistoryPlayer, self).play(r)
+
+
+def play_round(players, gameType='vanilla', isPoliced=False):
+    """Play a silent round with these players; return the Round."""
+    names = [player.get_name() for player in players]
+    r = Round(gameType, players, names, 'silent', isPoliced, {})
+    r.generate_deck_and_deal_hands()
+    while r.gameOverTimer != 0 and r.lightning != 3 and \
+          sum(r.progress.values()) != 5 * len(r.suits):
+        if r.deck == [] and r.gameOverTimer is None:
+            r.gameOverTimer = r.nPlayers
+        if r.gameOverTimer is not None:
+            r.gameOverTimer -= 1
+        r.get_play(players[r.whoseTurn])
+    return r
+
+
+class HandsAtTest(unittest.TestCase):
+
+    def test_window_matches_full_history(self):
+        for seed in range(5):
+            random.seed(seed)
+            fullHistory = []
+            players = [HistoryCheckingPlayer(i, None, 'silent')
+                       for i in range(3)]
+            for player in players:
+                player.fullHistory = fullHistory
+            r = play_round(players, 'rainbow')
+            self.assertGreater(r.turnNumber, HAND_HISTORY_WINDOW)
+            for player in players:
+                self.assertEqual(player.failures, [])
+                self.assertGreater(player.nChecked, 0)
+
+    def test_policed_copies(self):
+        for seed in range(3):
+            random.seed(seed)
+            players = [PolicedHistoryPlayer(i, None, 'silent')
+                       for i in range(3)]
+            play_round(players, isPoliced=True)
+            for player in players:
+                self.assertEqual(player.failures, [])
+                self.assertGreater(player.nChecked, 0)
+
+    def test_reads_outside_window_fail(self):
+        random.seed(0)
+        players = [NewestCardPlayer(i, None, 'silent') for i in range(2)]
+        r = play_round(players)
+        last = r.turnNumber - 1 # Hands of the last turn played are kept.
+        r.hands_at(last - HAND_HISTORY_WINDOW + 1)
+        for turn in (0, last - HAND_HISTORY_WINDOW, r.turnNumber + 1):
+            self.assertRaises(IndexError, r.hands_at, turn)
+
+
+def round_state(r):
+    """Copy of everything a move can change in r."""
+    return deepcopy((list(r.deck), [hand.cards for hand in r.h], r.progress,
+                     r.hints, r.lightning, r.whoseTurn, r.turnNumber,
+                     r.gameOverTimer, r.playHistory, r.progressHistory,
+                     r.DropIndRecord, r.discardpile, r.cardsLeft,
+                     r.publicKnowledge.knownCards, r.publicKnowledge.exhausted,
+                     list(r.handHistory), r.handHistoryTurns))
+
+
+class ForkTest(unittest.TestCase):
+
+    def test_fork_leaves_parent_alone(self):
+        for seed in range(5):
+            random.seed(seed)
+            players = [NewestCardPlayer(i, None, 'silent') for i in range(3)]
+            names = [player.get_name() for player in players]
+            r = Round('vanilla', players, names, 'silent', False, {})
+            r.generate_deck_and_deal_hands()
+            for turn in range(6):
+                r.get_play(players[r.whoseTurn])
+            before = round_state(r)
+
+            child = r.fork()
+            while child.deck != [] and child.lightning < 2:
+                hand = child.h[child.whoseTurn]
+                target = (child.whoseTurn + 1) % child.nPlayers
+                if child.hints and child.turnNumber % 3:
+                    info = child.h[target].cards[-1].name[child.turnNumber % 2]
+                    child.make_play(('hint', (target, info)))
+                elif child.turnNumber % 2:
+                    child.make_play(('play', hand.cards[0]))
+                else:
+                    child.make_play(('discard', hand.cards[-1]))
+            self.assertGreater(child.turnNumber, r.turnNumber)
+            self.assertNotEqual(round_state(child), before)
+            self.assertEqual(round_state(r), before)
+
+            # The parent plays on as if it had never been forked.
+            r.get_play(players[r.whoseTurn])
+            self.assertEqual(len(r.playHistory), len(before[8]) + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()